@@ -1,65 +1,764 @@
-from flask import Flask, render_template, request, redirect, url_for
-import pandas as pd
-import google.generativeai as genai
+from flask import Flask, render_template, request, redirect, url_for, jsonify, Response
+import numpy as np
+import atexit
 import os
+import json
+import threading
 import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from ingest import read_csv_typed, read_records_typed, SchemaError
+from dataset_store import DatasetStore, Snapshot, DEFAULT_NAMESPACE
+from gemini_client import make_model_from_env
+from investor_index import InvestorIndex, candidate_positions
+from job_queue import JobQueue
+import metrics
+from metrics import counter, gauge, histogram, timer
+from matcher import (iter_scores, iter_top_k_scores, combined_score, score_bound, rank_matches, score_founders,
+                     score_pairs, DEFAULT_STRUCTURED_WEIGHT, ERROR_SCORE, PROMPT_VERSION)
+from prefilter import encode_founders, encode_investors, rounded_structured_scores
+from resilience import ResilientModel, CircuitBreaker
+from scheduler import QuotaScheduler, PRIORITIES, parse_weights
+from score_cache import ScoreCache
+from semantic import SemanticMatcher
+from sharded import ShardedMatcher, ShardError, parse_addresses, AUTHKEY_ENV
+from single_flight import SingleFlight
+from topk_view import TopKView
 
 app = Flask(__name__)
 API_KEY = ""  # Replace with your actual Gemini API key
-genai.configure(api_key=API_KEY)
-model = genai.GenerativeModel('gemini-1.5-pro')
-
-founders_df = None
-investors_df = None
-
-def load_csv(file, type_):
-    global founders_df, investors_df
-    if type_ == 'founders':
-        founders_df = pd.read_csv(file)
-    elif type_ == 'investors':
-        investors_df = pd.read_csv(file)
-
-def calculate_match_score(founder_id):
-    founder_info = founders_df[founders_df['id'] == founder_id].iloc[0].to_dict()
-    investors_info = [row.to_dict() for _, row in investors_df.iterrows()]
-    matches = []
-    
-    for investor in investors_info:
-        prompt = f"""
-        Task: Analyze compatibility between a startup founder and an investor.
-        Founder Industry: {founder_info.get('industry', 'N/A')}, Stage: {founder_info.get('startup_stage', 'N/A')}
-        Investor Preferred Industry: {investor.get('preferred_industry', 'N/A')}, Stage: {investor.get('preferred_stage', 'N/A')}
-        Match Score: """
-        
-        try:
-            response = model.generate_content(prompt)
-            score = int(response.text.split("Match Score:")[1].strip()) if "Match Score:" in response.text else 50
-        except:
-            score = 0
-        
-        investor['match_score'] = score
-        matches.append(investor)
-        time.sleep(0.5)
-    
-    return sorted(matches, key=lambda x: x['match_score'], reverse=True)
+
+# Gemini quota: requests started per second and calls allowed in flight
+REQUESTS_PER_SECOND = float(os.environ.get("GEMINI_REQUESTS_PER_SECOND", 2))
+MAX_IN_FLIGHT = int(os.environ.get("GEMINI_MAX_IN_FLIGHT", 8))
+
+# Scatter-gather over MATCH_SHARDS local worker processes, or over the shard servers
+# in MATCH_SHARD_ADDRESSES="host:port,..." (same MATCH_SHARD_AUTHKEY); investors are
+# split by id. Shards do the scoring, so with shards this process keeps only a
+# MATCH_COORDINATOR_QUOTA_SHARE slice of the request rate (fallbacks, refines, bulk
+# work) and local workers split the rest. The workers also split all of
+# GEMINI_MAX_IN_FLIGHT, a per-process concurrency cap, and this process gets its share
+# of it (at least 1) on top. Remote servers can't be handed their part: start each of
+# N with --requests-per-second (1 - share) * GEMINI_REQUESTS_PER_SECOND / N and
+# --max-in-flight GEMINI_MAX_IN_FLIGHT / N so together they stay within the quota.
+MATCH_SHARDS = int(os.environ.get("MATCH_SHARDS", 0))
+MATCH_SHARD_ADDRESSES = os.environ.get("MATCH_SHARD_ADDRESSES", "")
+COORDINATOR_QUOTA_SHARE = (float(os.environ.get("MATCH_COORDINATOR_QUOTA_SHARE", 0.05))
+                           if MATCH_SHARDS or MATCH_SHARD_ADDRESSES else 1.0)
+LOCAL_REQUESTS_PER_SECOND = REQUESTS_PER_SECOND * COORDINATOR_QUOTA_SHARE
+LOCAL_MAX_IN_FLIGHT = max(1, round(MAX_IN_FLIGHT * COORDINATOR_QUOTA_SHARE))
+
+# Every Gemini call from this process goes through one scheduler: interactive before
+# bulk, weighted fair across tenants (SCHEDULER_TENANT_WEIGHTS="acme=2,beta=1", default weight 1)
+scheduler = QuotaScheduler(LOCAL_REQUESTS_PER_SECOND, LOCAL_MAX_IN_FLIGHT,
+                           tenant_weights=parse_weights(os.environ.get("SCHEDULER_TENANT_WEIGHTS")))
+
+# GEMINI_FAKE_LATENCY=<seconds> swaps in the local fake model (benchmarks, offline demos).
+# Calls are retried with backoff, fail fast while the API is down, get a
+# deadline, and (GEMINI_HEDGE=1) a duplicate request once they pass the p95.
+model = ResilientModel(
+    make_model_from_env('gemini-1.5-pro', api_key=API_KEY),
+    max_attempts=int(os.environ.get("GEMINI_MAX_ATTEMPTS", 3)),
+    timeout=float(os.environ.get("GEMINI_TIMEOUT_SECONDS", 30)),
+    hedge=os.environ.get("GEMINI_HEDGE", "") in ("1", "true", "yes"),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.environ.get("GEMINI_BREAKER_FAILURES", 5)),
+        reset_timeout=float(os.environ.get("GEMINI_BREAKER_RESET_SECONDS", 30)),
+    ),
+    bucket=scheduler.bucket,
+    max_in_flight=LOCAL_MAX_IN_FLIGHT,
+)
+# Investors scored per Gemini call (1 = one prompt per founder/investor pair)
+BATCH_SIZE = int(os.environ.get("GEMINI_BATCH_SIZE", 1))
+
+# Pair scores survive re-uploads of the same CSVs; MATCH_CACHE_DISABLED=1 bypasses it
+score_cache = ScoreCache(
+    os.environ.get("MATCH_CACHE_PATH", "match_scores.sqlite"),
+    ttl_seconds=float(os.environ.get("MATCH_CACHE_TTL_SECONDS", 7 * 24 * 3600)),
+    max_entries=int(os.environ.get("MATCH_CACHE_MAX_ENTRIES", 100000)),
+    enabled=os.environ.get("MATCH_CACHE_DISABLED", "") not in ("1", "true", "yes"),
+)
+
+# Only the best PREFILTER_TOP_K investors by structured pre-score go to Gemini (0 = all)
+PREFILTER_TOP_K = int(os.environ.get("PREFILTER_TOP_K", 0))
+# Restrict candidates with the investor index: "" = every investor, "any" or "all"
+INDEX_CANDIDATES = os.environ.get("INDEX_CANDIDATES", "")
+# "llm" scores with Gemini, "semantic" with the local vector matcher (no API calls)
+MATCH_MODE = os.environ.get("MATCH_MODE", "llm")
+# Only the SEMANTIC_TOP_K most similar investors go on to Gemini (0 = no semantic stage)
+SEMANTIC_TOP_K = int(os.environ.get("SEMANTIC_TOP_K", 0))
+# A match score is this share of the structured pre-score (industry, stage, ticket fit)
+# plus the rest of Gemini's 0-100 score, which caps what Gemini can add to each pair
+STRUCTURED_WEIGHT = float(os.environ.get("MATCH_STRUCTURED_WEIGHT", DEFAULT_STRUCTURED_WEIGHT))
+# Return only the best TOP_K_MATCHES investors (0 = all of them); investors whose cap
+# can't reach the k-th best score are never sent to Gemini
+TOP_K_MATCHES = int(os.environ.get("TOP_K_MATCHES", 0))
+# Keep each founder's MATERIALIZED_TOP_K best matches up to date as investors change (0 = off)
+MATERIALIZED_TOP_K = int(os.environ.get("MATERIALIZED_TOP_K", 0))
+# Investor changes with more rows than this drop the materialized rankings instead of rescoring
+MATERIALIZED_MAX_DELTA = int(os.environ.get("MATERIALIZED_MAX_DELTA", 100))
+# MATCH_JOBS=1 makes "Find Matches" queue a background job instead of holding the request
+MATCH_JOBS = os.environ.get("MATCH_JOBS", "") in ("1", "true", "yes")
+# Seconds a match request may spend on Gemini; investors not scored by then get an
+# estimated structured score and are scored in the background (0 = no budget)
+MATCH_BUDGET_SECONDS = float(os.environ.get("MATCH_BUDGET_SECONDS", 0))
+
+MATCH_STAGE_SECONDS = histogram("match_stage_seconds", "Time spent in each matching stage", ["stage"])
+MATCH_REQUESTS = counter("match_requests_total", "calculate_match_score calls")
+INGEST_SECONDS = histogram("ingest_seconds", "CSV upload parse + index time", ["type"])
+INGEST_ROWS = counter("ingest_rows_total", "Uploaded rows", ["type", "result"])
+INGEST_ROWS_PER_SECOND = gauge("ingest_rows_per_second", "Rows/s of the last upload", ["type"])
+CACHE_HIT_RATE = gauge("match_cache_hit_rate", "Score cache hit rate since start")
+SHARD_FALLBACKS = counter("match_shard_fallbacks_total", "Sharded matches answered locally after a shard error")
+
+# Uploaded datasets, one immutable snapshot per session/tenant namespace
+store = DatasetStore()
+# Materialized rankings per namespace
+views = {}
+# Match computations in flight; identical concurrent requests share one
+match_flights = SingleFlight("match")
+# Shard workers and, per namespace, the investor table and version they hold
+shards = None
+if MATCH_SHARD_ADDRESSES:
+    shards = ShardedMatcher(parse_addresses(MATCH_SHARD_ADDRESSES), os.environ[AUTHKEY_ENV].encode())
+elif MATCH_SHARDS:
+    shards = ShardedMatcher.start_local(MATCH_SHARDS, REQUESTS_PER_SECOND - LOCAL_REQUESTS_PER_SECOND,
+                                        MAX_IN_FLIGHT, BATCH_SIZE,
+                                        cache_path=score_cache.path if score_cache.enabled else None,
+                                        structured_weight=STRUCTURED_WEIGHT)
+if shards is not None:
+    atexit.register(shards.close)
+shard_tables = {}
+shard_lock = threading.Lock()
+# Scores investors a latency budget left out, at bulk priority, into the score cache
+refiner = ThreadPoolExecutor(max_workers=2)
+
+def current_namespace():
+    return request.headers.get("X-Tenant") or request.values.get("tenant") or DEFAULT_NAMESPACE
+
+def topk_view(namespace):
+    """
+    The namespace's materialized rankings, or None when they can't be
+    kept incrementally (candidate selection looks at the whole table)
+    """
+    if not MATERIALIZED_TOP_K or MATCH_MODE != 'llm' or INDEX_CANDIDATES or PREFILTER_TOP_K or SEMANTIC_TOP_K:
+        return None
+    return views.setdefault(namespace, TopKView(MATERIALIZED_TOP_K))
+
+def change_investors(namespace, upserted=None, deleted=(), append=False):
+    """
+    Insert/update (`upserted` frame) or delete investors, scoring only the
+    changed investors against the founders with a materialized ranking
+    """
+    if upserted is not None:
+        mutate = lambda: (store.append if append else store.upsert)(namespace, 'investors', upserted)
+    else:
+        mutate = lambda: store.delete(namespace, 'investors', deleted)
+    view = topk_view(namespace)
+    if view is None:
+        return mutate()
+    with view.write_lock:
+        snapshot = store.snapshot(namespace)
+        founder_ids = view.founder_ids(snapshot.version)
+        changes = {}
+        if upserted is not None and founder_ids:
+            if len(upserted) > MATERIALIZED_MAX_DELTA:
+                changes = None
+            else:
+                founders_df = snapshot.founders.drop_duplicates('id').set_index('id', drop=False)
+                founders_df = founders_df.loc[founder_ids]
+                founders_info = founders_df.to_dict('records')
+                arrays = encode_investors(upserted)
+                structured = rounded_structured_scores(encode_founders(founders_df, arrays), arrays)
+                for column, investor in enumerate(upserted.to_dict('records')):
+                    scores = score_founders(model, founders_info, investor,
+                                            limiter=scheduler.limiter('interactive', namespace),
+                                            max_workers=MAX_IN_FLIGHT, cache=score_cache)
+                    scores = [combined_score(structured[row, column], score, STRUCTURED_WEIGHT)
+                              for row, score in enumerate(scores)]
+                    changes[investor['id']] = {
+                        founder_id: ERROR_SCORE if score is None else score
+                        for founder_id, score in zip(founder_ids, scores)
+                    }
+        return view.update(snapshot.version, mutate, changes, deleted)
+
+def load_csv(file, type_, namespace=DEFAULT_NAMESPACE, append=False):
+    with timer(INGEST_SECONDS, type=type_) as ingest_timer:
+        existing_ids = ()
+        table = getattr(store.snapshot(namespace), type_)
+        if append and table is not None:
+            # Appended rows may not reuse an id already in the table
+            existing_ids = table['id'].tolist()
+        df, report = read_csv_typed(file, type_, existing_ids=existing_ids)
+        if append and type_ == 'investors':
+            change_investors(namespace, upserted=df, append=True)
+        elif append:
+            view = topk_view(namespace)
+            if view is None:
+                store.append(namespace, type_, df)
+            else:
+                # New founders leave the materialized rankings as they are
+                with view.write_lock:
+                    view.update(store.snapshot(namespace).version,
+                                lambda: store.append(namespace, type_, df), {})
+        else:
+            store.replace(namespace, type_, df)
+    INGEST_ROWS.inc(report.accepted, type=type_, result="accepted")
+    INGEST_ROWS.inc(report.rejected, type=type_, result="rejected")
+    if ingest_timer.elapsed:
+        INGEST_ROWS_PER_SECOND.set((report.accepted + report.rejected) / ingest_timer.elapsed, type=type_)
+    return report
+
+def semantic_matcher(snapshot):
+    # Built once per dataset version, then shared by every request
+    return snapshot.derived('semantic', lambda: SemanticMatcher(snapshot.investor_index.records))
+
+def select_candidates(snapshot, founder_id):
+    """
+    Founder row and the positions of the investors to score for it
+    """
+    founder_rows = snapshot.founders[snapshot.founders['id'] == founder_id].iloc[:1]
+    positions = candidate_positions(snapshot.investor_index, founder_rows, INDEX_CANDIDATES, PREFILTER_TOP_K,
+                                    SEMANTIC_TOP_K if MATCH_MODE == 'llm' else 0,
+                                    lambda: semantic_matcher(snapshot))
+    return founder_rows.iloc[0].to_dict(), positions
+
+def iter_match_scores(snapshot, founder_info, positions, use_cache=True, limiter=None, deadline=None,
+                      top_k=0):
+    """
+    Yield (i, score) for positions[i] as scores become available; Gemini
+    calls go through `limiter` (a scheduler class/tenant handle) and stop
+    being waited for at `deadline`. With `top_k`, only the investors that
+    can still make the best k are scored and yielded.
+    """
+    if MATCH_MODE == 'semantic':
+        yield from enumerate(semantic_matcher(snapshot).scores(founder_info, positions).tolist())
+        return
+    investors_info = [snapshot.investor_index.records[position] for position in positions]
+    structured = estimate_scores(snapshot, founder_info['id'], positions).tolist()
+    limiter = limiter or scheduler.limiter()
+    cache = score_cache if use_cache else None
+    if top_k:
+        yield from iter_top_k_scores(model, founder_info, investors_info, structured, top_k, STRUCTURED_WEIGHT,
+                                     limiter=limiter, max_workers=MAX_IN_FLIGHT, batch_size=BATCH_SIZE,
+                                     cache=cache, deadline=deadline)
+        return
+    for i, score in iter_scores(model, founder_info, investors_info, limiter=limiter,
+                                max_workers=MAX_IN_FLIGHT, batch_size=BATCH_SIZE, cache=cache,
+                                deadline=deadline):
+        yield i, combined_score(structured[i], score, STRUCTURED_WEIGHT)
+
+def estimate_scores(snapshot, founder_id, positions):
+    """
+    Deterministic 0-100 structured scores (industry, stage, ticket fit)
+    """
+    arrays = snapshot.investor_index.subset_arrays(positions)
+    return rounded_structured_scores(founder_arrays(snapshot, founder_id), arrays)[0]
+
+def founder_arrays(snapshot, founder_id):
+    """
+    A founder's structured encoding; every founder is encoded at once, the
+    first time one is needed for this snapshot
+    """
+    def build():
+        rows = {}
+        for row, id_ in enumerate(snapshot.founders['id'].tolist()):
+            rows.setdefault(id_, row)
+        return rows, encode_founders(snapshot.founders, snapshot.investor_index.arrays)
+
+    rows, arrays = snapshot.derived('founder_arrays', build)
+    row = rows[founder_id]
+    return {name: values[row:row + 1] for name, values in arrays.items()}
+
+def refine_in_background(founder_info, investors_info, namespace):
+    """
+    Score investors that missed a latency budget so the next request finds them cached
+    """
+    if score_cache.enabled and investors_info:
+        refiner.submit(score_pairs, model, founder_info, investors_info,
+                       limiter=scheduler.limiter('bulk', namespace), max_workers=MAX_IN_FLIGHT,
+                       batch_size=BATCH_SIZE, cache=score_cache)
+
+def sync_shards(snapshot, namespace, wait=True):
+    """
+    Make sure the shards hold this snapshot's investors; returns the
+    version they were loaded under. With wait=False a load that is still
+    needed is started in the background and None is returned.
+    """
+    if not wait:
+        loaded = shard_tables.get(namespace)
+        if loaded is not None and loaded[0] is snapshot.investors:
+            return loaded[1]
+        refiner.submit(sync_shards, snapshot, namespace)
+        return None
+    with shard_lock:
+        loaded = shard_tables.get(namespace)
+        if loaded is None or loaded[0] is not snapshot.investors:
+            shards.load(namespace, snapshot.version, snapshot.investors)
+            loaded = shard_tables[namespace] = (snapshot.investors, snapshot.version)
+        return loaded[1]
+
+def has_founder(snapshot, founder_id):
+    return (snapshot.founders is not None and snapshot.investor_index is not None
+            and bool((snapshot.founders['id'] == founder_id).any()))
+
+def calculate_match_score(founder_id, use_cache=True, namespace=DEFAULT_NAMESPACE, timings=None,
+                          top_k=None, progress=None, priority="interactive", budget=None):
+    """
+    Rank investors for a founder; pass a dict as `timings` to get the
+    seconds spent per stage back in it. With `top_k` (default
+    TOP_K_MATCHES) only the first k rows of the ranking are returned, and
+    investors whose score can't reach them are never sent to Gemini.
+    Identical calls made while one is running wait for it and share its
+    result. `progress(scored, total, partial)` is called as investors are
+    scored, with `partial()` giving the ranking so far. Gemini calls are
+    queued in the scheduler under `priority` and the namespace as tenant.
+
+    With a `budget` in seconds (default MATCH_BUDGET_SECONDS) scoring stops
+    at the deadline: the investors left get their structured score, every
+    row gets an `estimated` flag, and the estimated ones are scored in the
+    background for the next request.
+    """
+    MATCH_REQUESTS.inc()
+    top_k = TOP_K_MATCHES if top_k is None else top_k
+    budget = MATCH_BUDGET_SECONDS if budget is None else budget
+    deadline = time.monotonic() + budget if budget else None
+    # Work on one snapshot throughout, even if an upload swaps in a new one meanwhile
+    snapshot = store.snapshot(namespace)
+    key = (namespace, founder_id, snapshot.version, PROMPT_VERSION, top_k, use_cache, priority, budget)
+    call, leader = match_flights.begin(key)
+    if not leader:
+        with timer(MATCH_STAGE_SECONDS, timings, stage="coalesced"):
+            return list(SingleFlight.wait(call))
+    try:
+        matches = rank_investors(snapshot, namespace, founder_id, use_cache, timings, top_k, progress,
+                                 scheduler.limiter(priority, namespace), deadline)
+    except BaseException as exc:
+        match_flights.finish(key, call, error=exc)
+        raise
+    match_flights.finish(key, call, matches)
+    return matches
+
+def rank_investors(snapshot, namespace, founder_id, use_cache, timings, top_k, progress=None,
+                   limiter=None, deadline=None):
+    """
+    The work behind calculate_match_score, on one dataset snapshot
+    """
+    view = topk_view(namespace)
+    # The view only holds each founder's best k; a full ranking or a larger top_k needs every row
+    if view is not None and use_cache and 0 < top_k <= view.k:
+        matches = materialized_matches(view, snapshot, namespace, founder_id, top_k,
+                                       timings, limiter, deadline)
+        if matches is not None:
+            return matches
+    if shards is not None and snapshot.investors is not None and MATCH_MODE == 'llm':
+        with timer(MATCH_STAGE_SECONDS, timings, stage="scatter_gather"):
+            founder_rows = snapshot.founders[snapshot.founders['id'] == founder_id].iloc[:1]
+            try:
+                # Under a budget, don't wait for the shards to load a new dataset
+                version = sync_shards(snapshot, namespace, wait=deadline is None)
+                if version is None:
+                    raise ShardError("shards are still loading this dataset")
+                rows, unscored = shards.match(namespace, version, founder_rows, top_k, use_cache, deadline,
+                                              getattr(limiter, 'priority', 'interactive'),
+                                              (INDEX_CANDIDATES, PREFILTER_TOP_K, SEMANTIC_TOP_K))
+            except ShardError:
+                # Shards moved on to newer data, one is down or too slow: answer from this process
+                SHARD_FALLBACKS.inc()
+            else:
+                if deadline is None:
+                    return [dict(investor, match_score=score) for score, _, investor in rows]
+                return shard_matches_with_estimates(snapshot, namespace, founder_rows, rows, unscored,
+                                                    top_k, use_cache)
+    return rank_snapshot(snapshot, namespace, founder_id, use_cache, timings, top_k, progress,
+                         limiter, deadline)
+
+def rank_snapshot(snapshot, namespace, founder_id, use_cache, timings, top_k, progress=None,
+                  limiter=None, deadline=None):
+    """
+    Rank investors for a founder in this process, without the materialized
+    view or the shards
+
+    With `top_k`, investors pruned by branch-and-bound are left out; under
+    a `deadline` they get estimates like the investors the budget cut off,
+    which never exceed their bound and so never make the top k.
+    """
+    with timer(MATCH_STAGE_SECONDS, timings, stage="candidates"):
+        founder_info, positions = select_candidates(snapshot, founder_id)
+    investors_info = [snapshot.investor_index.records[position] for position in positions]
+    with timer(MATCH_STAGE_SECONDS, timings, stage="scoring"):
+        scores = [None] * len(positions)
+        seen = []
+        for i, score in iter_match_scores(snapshot, founder_info, positions, use_cache, limiter, deadline,
+                                          top_k):
+            scores[i] = score
+            seen.append(i)
+            if progress is not None:
+                progress(len(seen), len(positions),
+                         lambda: rank_matches([investors_info[j] for j in seen], [scores[j] for j in seen]))
+    ranked = sorted(seen)
+    if deadline is not None:
+        scored = set(seen)
+        missing = [i for i in range(len(positions)) if i not in scored]
+        if missing and MATCH_MODE == 'llm':
+            with timer(MATCH_STAGE_SECONDS, timings, stage="estimate"):
+                estimates = estimate_scores(snapshot, founder_id, np.asarray(positions)[missing])
+                for i, estimate in zip(missing, estimates.tolist()):
+                    scores[i] = estimate
+        investors_info = [dict(investor, estimated=i not in scored) for i, investor in enumerate(investors_info)]
+        ranked = range(len(positions))
+    with timer(MATCH_STAGE_SECONDS, timings, stage="ranking"):
+        matches = rank_matches([investors_info[i] for i in ranked], [scores[i] for i in ranked])
+    matches = matches[:top_k] if top_k else matches
+    if deadline is not None and use_cache and MATCH_MODE == 'llm':
+        # Score the investors left out that could still make the answer, not the pruned ones
+        floor = matches[-1]['match_score'] if top_k and len(matches) == top_k else None
+        refine_in_background(founder_info, [investors_info[i] for i in missing
+                                            if floor is None or score_bound(scores[i], STRUCTURED_WEIGHT) >= floor],
+                             namespace)
+    return matches
+
+def shard_matches_with_estimates(snapshot, namespace, founder_rows, rows, unscored, top_k, use_cache):
+    """
+    Rank the shards' scored rows together with structured estimates for
+    the investors they had no time to score, flagging every row like the
+    budgeted local path does
+    """
+    records = snapshot.investor_index.records
+    estimates = []
+    if unscored:
+        estimates = estimate_scores(snapshot, founder_rows['id'].iloc[0], np.asarray(unscored)).tolist()
+        rows = sorted(rows + [(estimate, position, records[position])
+                              for position, estimate in zip(unscored, estimates)],
+                      key=lambda row: (-row[0], row[1]))
+    estimated = set(unscored)
+    rows = rows[:top_k] if top_k else rows
+    if use_cache:
+        # Shards leave the investors they pruned unscored too; only refine those that could make the answer
+        floor = rows[-1][0] if top_k and len(rows) == top_k else None
+        refine_in_background(founder_rows.iloc[0].to_dict(),
+                             [records[position] for position, estimate in zip(unscored, estimates)
+                              if floor is None or score_bound(estimate, STRUCTURED_WEIGHT) >= floor], namespace)
+    return [dict(investor, estimated=position in estimated, match_score=score)
+            for score, position, investor in rows]
+
+def materialized_matches(view, snapshot, namespace, founder_id, k, timings=None, limiter=None,
+                         deadline=None):
+    """
+    A founder's best k matches from the materialized view, ranking every
+    investor first if this founder hasn't been materialized yet
+
+    Ranking every investor can't be cut short, so with a `deadline` a
+    founder that isn't materialized gets None back (answer from the
+    budgeted path instead) and is materialized in the background.
+    """
+    investor_index = snapshot.investor_index
+    ranking = view.get(founder_id, snapshot.version)
+    if ranking is None and deadline is not None:
+        refiner.submit(materialized_matches, view, snapshot, namespace, founder_id, k,
+                       limiter=scheduler.limiter('bulk', namespace))
+        return None
+    if ranking is None:
+        with timer(MATCH_STAGE_SECONDS, timings, stage="candidates"):
+            founder_info, positions = select_candidates(snapshot, founder_id)
+        with timer(MATCH_STAGE_SECONDS, timings, stage="scoring"):
+            scores = [None] * len(positions)
+            for i, score in iter_match_scores(snapshot, founder_info, positions, limiter=limiter):
+                scores[i] = score
+        investor_ids = [investor_index.records[position]['id'] for position in positions]
+        view.materialize(founder_id, snapshot.version, investor_ids,
+                         [ERROR_SCORE if score is None else score for score in scores])
+        ranking = view.get(founder_id, snapshot.version)
+        if ranking is None:
+            # The view moved on to a newer dataset meanwhile; answer from this snapshot
+            return rank_matches([investor_index.records[position] for position in positions], scores)[:k]
+    with timer(MATCH_STAGE_SECONDS, timings, stage="ranking"):
+        positions_by_id = snapshot.derived('positions_by_id', lambda: {
+            record['id']: position for position, record in enumerate(investor_index.records)
+        })
+        return [dict(investor_index.records[positions_by_id[investor_id]], match_score=score)
+                for investor_id, score in ranking[:k]]
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    global founders_df, investors_df
+    namespace = current_namespace()
     matches = []
+    upload_reports = {}
+    upload_error = None
     founder_id = request.form.get("founder_id")
     
+    job_id = None
+    
     if request.method == 'POST':
-        if 'founders' in request.files:
-            load_csv(request.files['founders'], 'founders')
-        if 'investors' in request.files:
-            load_csv(request.files['investors'], 'investors')
-        if founder_id:
-            matches = calculate_match_score(int(founder_id))
+        try:
+            for type_ in ('founders', 'investors'):
+                if type_ in request.files and request.files[type_].filename:
+                    upload_reports[type_] = load_csv(request.files[type_], type_, namespace,
+                                                     append=bool(request.form.get("append"))).to_dict()
+        except SchemaError as e:
+            upload_error = str(e)
+        if founder_id and MATCH_JOBS:
+            job_id = jobs.submit({'founder_id': int(founder_id), 'namespace': namespace,
+                                  'priority': 'interactive'})
+        elif founder_id:
+            matches = calculate_match_score(int(founder_id), namespace=namespace)
     
+    founders_df = store.snapshot(namespace).founders
     return render_template('index.html', 
                            founders=founders_df.to_dict('records') if founders_df is not None else [],
-                           matches=matches)
+                           matches=matches,
+                           upload_reports=upload_reports,
+                           upload_error=upload_error,
+                           job_id=job_id)
+
+@app.route('/api/matches/<int:founder_id>')
+def api_matches(founder_id):
+    """
+    Ranked matches for a founder as JSON, paginated with ?page=&per_page=;
+    ?top_k= keeps only the best k, ?budget=<seconds> bounds the scoring time
+    """
+    namespace = current_namespace()
+    snapshot = store.snapshot(namespace)
+    if not has_founder(snapshot, founder_id):
+        return jsonify({'error': f'unknown founder {founder_id}'}), 404
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(100, max(1, request.args.get('per_page', 20, type=int)))
+
+    timings = {} if request.args.get('timings') else None
+    matches = calculate_match_score(founder_id, namespace=namespace, timings=timings,
+                                    top_k=request.args.get('top_k', type=int),
+                                    budget=request.args.get('budget', type=float))
+    start = (page - 1) * per_page
+    body = {
+        'founder_id': founder_id,
+        'dataset_version': snapshot.version,
+        'total': len(matches),
+        'page': page,
+        'per_page': per_page,
+        'matches': matches[start:start + per_page],
+    }
+    if timings is not None:
+        body['timings_ms'] = {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()}
+    return jsonify(body)
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.route('/api/matches/<int:founder_id>/stream')
+def api_matches_stream(founder_id):
+    """
+    Server-sent events: one `score` event per investor as soon as it is
+    scored, then a `summary` event with the full ranking
+    """
+    namespace = current_namespace()
+    snapshot = store.snapshot(namespace)
+    if not has_founder(snapshot, founder_id):
+        return jsonify({'error': f'unknown founder {founder_id}'}), 404
+    founder_info, positions = select_candidates(snapshot, founder_id)
+    investors_info = [snapshot.investor_index.records[position] for position in positions]
+    use_cache = request.args.get('cache', '1') != '0'
+
+    def generate():
+        scores = [None] * len(investors_info)
+        scored = 0
+        for i, score in iter_match_scores(snapshot, founder_info, positions, use_cache,
+                                          scheduler.limiter('interactive', namespace)):
+            scores[i] = score
+            scored += 1
+            investor = investors_info[i]
+            yield sse_event('score', {
+                'investor_id': investor.get('id'),
+                'name': investor.get('name'),
+                'match_score': ERROR_SCORE if score is None else score,
+                'scored': scored,
+                'total': len(investors_info),
+            })
+        yield sse_event('summary', {
+            'founder_id': founder_id,
+            'dataset_version': snapshot.version,
+            'matches': rank_matches(investors_info, scores),
+        })
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/investors', methods=['POST'])
+def api_upsert_investors():
+    """
+    Insert or update investors (matched by id) from a JSON object or list
+    """
+    namespace = current_namespace()
+    rows = request.get_json(silent=True)
+    if isinstance(rows, dict):
+        rows = [rows]
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return jsonify({'error': 'expected an investor object or a list of them'}), 400
+    try:
+        df, report = read_records_typed(rows, 'investors')
+    except SchemaError as e:
+        return jsonify({'error': str(e)}), 400
+    snapshot = change_investors(namespace, upserted=df) if len(df) else store.snapshot(namespace)
+    return jsonify({'dataset_version': snapshot.version, 'report': report.to_dict()})
+
+@app.route('/api/investors/<int:investor_id>', methods=['DELETE'])
+def api_delete_investor(investor_id):
+    namespace = current_namespace()
+    snapshot = store.snapshot(namespace)
+    if snapshot.investors is None or not (snapshot.investors['id'] == investor_id).any():
+        return jsonify({'error': f'unknown investor {investor_id}'}), 404
+    snapshot = change_investors(namespace, deleted=[investor_id])
+    return jsonify({'dataset_version': snapshot.version})
+
+# Uploaded datasets live in memory, so the founders and investors a job is submitted
+# against are saved under MATCH_JOB_DATA_PATH (once per uploaded table pair) and the
+# job payload names the file; jobs a restart interrupted run again against it
+JOB_DATA_PATH = os.environ.get("MATCH_JOB_DATA_PATH", "match_job_data")
+# Datasets read back from disk that are kept in memory for the jobs after them
+JOB_DATASETS_CACHED = 2
+job_data_lock = threading.Lock()
+# namespace -> (founders, investors, file name) last saved for it
+saved_datasets = {}
+# file name -> Snapshot read back from it
+job_datasets = OrderedDict()
+
+def run_match_job(payload, progress):
+    namespace, founder_id = payload['namespace'], payload['founder_id']
+    top_k, priority = payload.get('top_k'), payload.get('priority', 'bulk')
+    snapshot = store.snapshot(namespace)
+    saved = saved_datasets.get(namespace)
+    if 'dataset' not in payload or (saved is not None and saved[2] == payload['dataset']
+                                    and saved[0] is snapshot.founders and saved[1] is snapshot.investors):
+        # Still the namespace's current data: share the view, shards and in-flight matches
+        if not has_founder(snapshot, founder_id):
+            raise LookupError(f"unknown founder {founder_id} in namespace {namespace!r}"
+                              " (no such founder, or no investors uploaded)")
+        return calculate_match_score(founder_id, namespace=namespace, top_k=top_k, progress=progress,
+                                     priority=priority)
+    snapshot = job_dataset(payload['dataset'])
+    if not has_founder(snapshot, founder_id):
+        raise LookupError(f"unknown founder {founder_id} in the dataset the job was submitted against")
+    return rank_snapshot(snapshot, namespace, founder_id, True, None,
+                         TOP_K_MATCHES if top_k is None else top_k, progress,
+                         scheduler.limiter(priority, namespace))
+
+def submit_job(snapshot, namespace, payload):
+    """
+    Queue a match job against this snapshot, saving its tables for the job
+    unless they already were
+    """
+    with job_data_lock:
+        saved = saved_datasets.get(namespace)
+        if saved is None or saved[0] is not snapshot.founders or saved[1] is not snapshot.investors:
+            os.makedirs(JOB_DATA_PATH, exist_ok=True)
+            name = f"{uuid.uuid4().hex}.pkl"
+            pd.to_pickle({'founders': snapshot.founders, 'investors': snapshot.investors},
+                         os.path.join(JOB_DATA_PATH, name))
+            saved = saved_datasets[namespace] = (snapshot.founders, snapshot.investors, name)
+            prune_job_data()
+        return jobs.submit(dict(payload, namespace=namespace, dataset=saved[2]))
+
+def prune_job_data():
+    """
+    Delete the saved datasets no queued or running job needs any more
+    """
+    if not os.path.isdir(JOB_DATA_PATH):
+        return
+    keep = {name for _, _, name in saved_datasets.values()}
+    keep.update(payload.get('dataset') for payload in jobs.pending_payloads())
+    for name in os.listdir(JOB_DATA_PATH):
+        if name.endswith('.pkl') and name not in keep:
+            os.remove(os.path.join(JOB_DATA_PATH, name))
+
+def job_dataset(name):
+    """
+    Snapshot of the tables saved under `name` for a job
+    """
+    with job_data_lock:
+        snapshot = job_datasets.get(name)
+        if snapshot is not None:
+            job_datasets.move_to_end(name)
+            return snapshot
+    try:
+        tables = pd.read_pickle(os.path.join(JOB_DATA_PATH, name))
+    except FileNotFoundError:
+        raise LookupError(f"the dataset the job was submitted against ({name}) is gone") from None
+    investors = tables['investors']
+    snapshot = Snapshot(tables['founders'], investors, None if investors is None else InvestorIndex(investors))
+    with job_data_lock:
+        snapshot = job_datasets.setdefault(name, snapshot)
+        while len(job_datasets) > JOB_DATASETS_CACHED:
+            job_datasets.popitem(last=False)
+    return snapshot
+
+# Background match jobs, kept in SQLite so their status and results survive a
+# restart; jobs a restart interrupted are queued again
+jobs = JobQueue(run_match_job,
+                path=os.environ.get("MATCH_JOBS_PATH", "match_jobs.sqlite"),
+                workers=int(os.environ.get("MATCH_JOB_WORKERS", 2)))
+with job_data_lock:
+    prune_job_data()
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """
+    Queue a match job for `founder_id` (JSON or form, optional `top_k`,
+    and `priority`, "bulk" by default)
+    """
+    namespace = current_namespace()
+    body = request.get_json(silent=True) or request.form
+    try:
+        founder_id = int(body.get('founder_id'))
+        top_k = int(body['top_k']) if body.get('top_k') not in (None, '') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'founder_id and top_k must be integers'}), 400
+    priority = body.get('priority') or 'bulk'
+    if priority not in PRIORITIES:
+        return jsonify({'error': f"priority must be one of {', '.join(PRIORITIES)}"}), 400
+    snapshot = store.snapshot(namespace)
+    if not has_founder(snapshot, founder_id):
+        return jsonify({'error': f'unknown founder {founder_id}'}), 404
+    job_id = submit_job(snapshot, namespace, {'founder_id': founder_id, 'top_k': top_k,
+                                              'priority': priority})
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('api_job_status', job_id=job_id),
+        'result_url': url_for('api_job_result', job_id=job_id),
+    }), 202
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """
+    Job status, progress (investors scored of total) and the partial ranking
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f'unknown job {job_id}'}), 404
+    job.pop('result')
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/result')
+def api_job_result(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f'unknown job {job_id}'}), 404
+    if job['status'] == 'failed':
+        return jsonify({'job_id': job_id, 'status': 'failed', 'error': job['error']}), 500
+    if job['status'] != 'done':
+        return jsonify({'job_id': job_id, 'status': job['status'], 'progress': job['progress']}), 202
+    return jsonify({'job_id': job_id, 'status': 'done', 'matches': job['result']})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    Prometheus text exposition of the matcher's counters and histograms
+    """
+    CACHE_HIT_RATE.set(score_cache.stats()['hit_rate'])
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     app.run(debug=True)
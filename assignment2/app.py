@@ -13,10 +13,19 @@ UPLOAD_FOLDER = "uploads"  # Keep the uploads inside assignment2
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 
+# Load the scoring model once at startup rather than on the first upload
+pitch_analyzer.warm_up()
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/ready')
+def ready():
+    # 503 until the scoring model has loaded, for load balancer readiness checks
+    status = pitch_analyzer.model_status()
+    return jsonify(status), 200 if status['ready'] else 503
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -27,8 +36,17 @@ def upload_file():
     file_path = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
     file.save(file_path)
     
+    # Read the deck the same way the batch CLI reads a directory of decks
+    try:
+        pitch_deck = pitch_analyzer.read_pitch_deck(file_path)
+    except ValueError as e:
+        return jsonify({'error': f'Could not read pitch deck: {e}'}), 400
+    if not isinstance(pitch_deck, dict) or 'content' not in pitch_deck:
+        return jsonify({'error': 'Upload a .txt or .md deck, or a .json object with "content"'}), 400
+    pitch_deck.setdefault('name', os.path.splitext(file.filename)[0])
+    
     # Call the pitch analysis function
-    analysis_results = pitch_analyzer.analyze_pitch(file_path)
+    analysis_results = pitch_analyzer.analyze_pitch(pitch_deck)
     
     return jsonify({'results': analysis_results})
 
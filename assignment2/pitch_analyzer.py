@@ -1,18 +1,53 @@
+import argparse
+import itertools
+import json
+import logging
+import os
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from transformers import BertTokenizer, BertModel
-import torch
-import torch.nn.functional as F
-
-# Make sure NLTK data is available
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# NLTK data shipped with the analyzer; nothing is downloaded at runtime.
+# nltk, transformers and torch are only imported when first needed, so
+# keyword-only analysis starts fast and works offline.
+NLTK_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data')
+
+logger = logging.getLogger(__name__)
+
+_stop_words = None
+_word_tokenize = None
+
+def _nltk():
+    import nltk
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    return nltk
+
+def get_stop_words():
+    """
+    English stopwords from the bundled NLTK corpus, read once
+    """
+    global _stop_words
+    if _stop_words is None:
+        _stop_words = frozenset(_nltk().corpus.stopwords.words('english'))
+    return _stop_words
+
+def tokenize(text):
+    """
+    NLTK word_tokenize when punkt data is installed, else a regex tokenizer
+    """
+    global _word_tokenize
+    if _word_tokenize is None:
+        nltk = _nltk()
+        try:
+            nltk.word_tokenize("punkt check")
+            _word_tokenize = nltk.word_tokenize
+        except LookupError:
+            _word_tokenize = lambda text: re.findall(r'\w+', text)
+    return _word_tokenize(text)
 
 def preprocess_text(text):
     """
@@ -26,10 +61,10 @@ def preprocess_text(text):
     text = re.sub(r'\d+', '', text)
     
     # Tokenize text
-    tokens = word_tokenize(text)
+    tokens = tokenize(text)
     
     # Remove stopwords
-    stop_words = set(stopwords.words('english'))
+    stop_words = get_stop_words()
     filtered_tokens = [word for word in tokens if word not in stop_words]
     
     # Join the tokens back into text
@@ -37,77 +72,151 @@ def preprocess_text(text):
     
     return preprocessed_text
 
-def identify_sections(pitch_text):
+class KeywordAutomaton:
     """
-    Identify key sections from a pitch deck text
+    Every occurrence of a fixed set of lowercase phrases, in one pass
+
+    The phrases are compiled into a trie and the trie into one regex, so
+    "market", "market size" and "management" become
+    ma(?:rket(?: size)?|nagement). Each text position then costs at most
+    one walk down the trie however many phrases there are, and the scan
+    is linear in the text length. The phrases matching at a position all
+    lie on that one path: the longest match and those of its prefixes
+    that are phrases too. A phrase is found exactly when `phrase in text`.
     """
-    sections = {
-        'problem': None,
-        'solution': None,
-        'market': None,
-        'business_model': None,
-        'financials': None,
-        'team': None
-    }
+    def __init__(self, phrases):
+        self.phrases = list(dict.fromkeys(phrases))
+        trie = {}
+        for phrase in self.phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        self.pattern = re.compile(self._trie_regex(trie))
+        self.prefixes = {
+            phrase: [other for other in self.phrases if phrase.startswith(other)]
+            for phrase in self.phrases
+        }
     
-    # Keywords to identify each section
-    section_keywords = {
-        'problem': ['problem', 'challenge', 'pain point', 'issue', 'need'],
-        'solution': ['solution', 'product', 'service', 'offering', 'value proposition'],
-        'market': ['market', 'industry', 'opportunity', 'tam', 'sam', 'som', 'customers'],
-        'business_model': ['business model', 'revenue', 'pricing', 'monetization', 'go-to-market'],
-        'financials': ['financials', 'projections', 'forecast', 'revenue', 'profits', 'burn rate'],
-        'team': ['team', 'founders', 'leadership', 'management', 'experience', 'background']
-    }
+    @classmethod
+    def _trie_regex(cls, node):
+        terminal = '' in node
+        branches = [re.escape(char) + cls._trie_regex(child) for char, child in node.items() if char]
+        if not branches:
+            return ''
+        regex = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Optional tail: greedy, so the longest phrase at a position wins
+        return '(?:' + regex + ')?' if terminal else regex
     
-    # Assign weights to sections
-    section_weights = {
-        'problem': 0.15,
-        'solution': 0.20,
-        'market': 0.15,
-        'business_model': 0.20,
-        'financials': 0.15,
-        'team': 0.15
-    }
+    def scan(self, text):
+        """
+        [(start offset, phrase)] for every occurrence, overlapping ones included
+        """
+        search, prefixes = self.pattern.search, self.prefixes
+        hits = []
+        match = search(text)
+        while match is not None:
+            start = match.start()
+            hits.extend((start, phrase) for phrase in prefixes[match.group()])
+            # Restart one character on, phrases may overlap
+            match = search(text, start + 1)
+        return hits
+    
+    def found(self, text):
+        """
+        The set of phrases occurring in text
+        """
+        return {phrase for _, phrase in self.scan(text)}
+
+# Keywords to identify each section
+SECTION_KEYWORDS = {
+    'problem': ['problem', 'challenge', 'pain point', 'issue', 'need'],
+    'solution': ['solution', 'product', 'service', 'offering', 'value proposition'],
+    'market': ['market', 'industry', 'opportunity', 'tam', 'sam', 'som', 'customers'],
+    'business_model': ['business model', 'revenue', 'pricing', 'monetization', 'go-to-market'],
+    'financials': ['financials', 'projections', 'forecast', 'revenue', 'profits', 'burn rate'],
+    'team': ['team', 'founders', 'leadership', 'management', 'experience', 'background']
+}
+
+# Assign weights to sections
+SECTION_WEIGHTS = {
+    'problem': 0.15,
+    'solution': 0.20,
+    'market': 0.15,
+    'business_model': 0.20,
+    'financials': 0.15,
+    'team': 0.15
+}
+
+# Every section keyword compiled once; a keyword may belong to several sections
+_KEYWORD_SECTIONS = {}
+for _section, _keywords in SECTION_KEYWORDS.items():
+    for _keyword in _keywords:
+        _KEYWORD_SECTIONS.setdefault(_keyword, []).append(_section)
+_SECTION_AUTOMATON = KeywordAutomaton(_KEYWORD_SECTIONS)
+
+def identify_sections(pitch_text):
+    """
+    Identify key sections from a pitch deck text
+    """
+    sections = {section_name: None for section_name in SECTION_KEYWORDS}
     
     # Split text into paragraphs
     paragraphs = pitch_text.split('\n\n')
     
-    # First pass: Look for section headings
+    # One scan per paragraph finds both the sections it mentions anywhere
+    # and the ones it opens with a "keyword:" heading
+    mentions = []
     for i, paragraph in enumerate(paragraphs):
-        paragraph_lower = paragraph.lower().strip()
+        paragraph_lower = paragraph.lower()
+        text_start = len(paragraph_lower) - len(paragraph_lower.lstrip())
+        mentioned, headings = set(), set()
+        for offset, keyword in _SECTION_AUTOMATON.scan(paragraph_lower):
+            mentioned.update(_KEYWORD_SECTIONS[keyword])
+            if offset == text_start and paragraph_lower.startswith(':', offset + len(keyword)):
+                headings.update(_KEYWORD_SECTIONS[keyword])
+        mentions.append(mentioned)
         
-        for section_name, keywords in section_keywords.items():
-            # Check if paragraph starts with any of the keywords
-            if any(paragraph_lower.startswith(keyword + ":") for keyword in keywords):
-                sections[section_name] = paragraph
-                
-                # If there's a next paragraph, append it (likely part of the same section)
-                if i + 1 < len(paragraphs):
-                    sections[section_name] += " " + paragraphs[i + 1]
-    
-    # Second pass: If sections are still empty, look for keywords anywhere in paragraphs
+        # First pass: section headings, the last heading of a section wins
+        for section_name in headings:
+            sections[section_name] = paragraph
+            
+            # If there's a next paragraph, append it (likely part of the same section)
+            if i + 1 < len(paragraphs):
+                sections[section_name] += " " + paragraphs[i + 1]
+    
+    # Second pass: If sections are still empty, collect the paragraphs mentioning their keywords
     for section_name, section_content in sections.items():
         if section_content is None:
-            for paragraph in paragraphs:
-                paragraph_lower = paragraph.lower()
-                if any(keyword in paragraph_lower for keyword in section_keywords[section_name]):
-                    if sections[section_name] is None:
-                        sections[section_name] = paragraph
-                    else:
-                        sections[section_name] += " " + paragraph
+            matching = [paragraph for paragraph, mentioned in zip(paragraphs, mentions) if section_name in mentioned]
+            if matching:
+                sections[section_name] = " ".join(matching)
     
-    return sections, section_weights
+    return sections, dict(SECTION_WEIGHTS)
+
+def embedding_settings():
+    """
+    PitchScoringModel arguments from the PITCH_EMBEDDING_* environment
+    """
+    threads = os.environ.get('PITCH_TORCH_THREADS')
+    return {
+        'embedding_model': os.environ.get('PITCH_EMBEDDING_MODEL') or None,
+        'quantize': os.environ.get('PITCH_EMBEDDING_QUANTIZE', '').lower() in ('1', 'true', 'yes'),
+        'threads': int(threads) if threads else None,
+        'embedding_weight': float(os.environ.get('PITCH_EMBEDDING_WEIGHT', '0.3')),
+        'batch_size': int(os.environ.get('PITCH_EMBEDDING_BATCH_SIZE', '32')),
+    }
 
 class PitchScoringModel:
-    def __init__(self):
-        try:
-            self.tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-            self.model = BertModel.from_pretrained('bert-base-uncased')
-        except:
-            # Fallback if BERT model loading fails
-            self.tokenizer = None
-            self.model = None
+    def __init__(self, embedding_model=None, quantize=False, threads=None, embedding_weight=0.3, batch_size=32):
+        # BERT (e.g. 'bert-base-uncased') is only loaded when asked for;
+        # keyword scoring does not need it
+        self.tokenizer = None
+        self.model = None
+        self.ideal_embeddings = None
+        self.embedding_weight = embedding_weight
+        self.batch_size = batch_size
+        self.max_length = 256
         
         # Define quality patterns for each section
         self.quality_patterns = {
@@ -136,10 +245,86 @@ class PitchScoringModel:
                 "track record", "complementary skills", "advisors", "board members"
             ]
         }
+        # All quality patterns in one automaton, so a section is scanned once
+        self.pattern_automaton = KeywordAutomaton(
+            pattern.lower() for patterns in self.quality_patterns.values() for pattern in patterns
+        )
+        
+        if embedding_model:
+            self.load_embeddings(embedding_model, quantize, threads)
+    
+    def load_embeddings(self, name, quantize=False, threads=None):
+        """
+        Load a BERT encoder for similarity scoring, optionally with int8
+        dynamically quantized Linear layers and a fixed torch thread count
+        """
+        try:
+            import torch
+            from transformers import BertTokenizer, BertModel
+            if threads:
+                torch.set_num_threads(threads)
+            self.use_encoder(BertTokenizer.from_pretrained(name), BertModel.from_pretrained(name), quantize)
+        except Exception:
+            # Fall back to keyword-only scoring, but say why
+            logger.exception("Could not load embedding model %r, using keyword scoring only", name)
+            self.tokenizer = None
+            self.model = None
+            self.ideal_embeddings = None
+    
+    def use_encoder(self, tokenizer, model, quantize=False):
+        """
+        Score similarity with an already built tokenizer and BERT model
+        """
+        import torch
+        model.eval()
+        if quantize:
+            # int8 weights, activations quantized on the fly: faster CPU matmuls
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.tokenizer, self.model = tokenizer, model
+        # Each section's ideal is the embedding of its quality patterns
+        ideals = self.embed([", ".join(patterns) for patterns in self.quality_patterns.values()])
+        self.ideal_embeddings = dict(zip(self.quality_patterns, ideals))
+    
+    def embed(self, texts):
+        """
+        Mean-pooled, L2-normalized BERT embeddings, one row per text
+        
+        Texts are sorted by length and encoded in padded batches of
+        `batch_size` under torch.no_grad(), so batches carry little padding
+        and no autograd state.
+        """
+        import torch
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        rows = [None] * len(texts)
+        with torch.no_grad():
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                encoded = self.tokenizer([texts[i] for i in batch], padding=True, truncation=True,
+                                         max_length=self.max_length, return_tensors='pt')
+                hidden = self.model(**encoded).last_hidden_state
+                mask = encoded['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+                for i, row in zip(batch, torch.nn.functional.normalize(pooled, dim=-1)):
+                    rows[i] = row
+        return rows
+    
+    def similarity_scores(self, texts_by_section):
+        """
+        {(section name, text): 0-100 cosine similarity to the section's
+        ideal embedding}, embedding every distinct text in shared batches
+        """
+        keys = [key for key in dict.fromkeys(texts_by_section) if key[0] in self.ideal_embeddings]
+        texts = list(dict.fromkeys(text for _, text in keys))
+        embeddings = dict(zip(texts, self.embed(texts)))
+        return {
+            (section_name, text): max(0.0, float(embeddings[text] @ self.ideal_embeddings[section_name])) * 100
+            for section_name, text in keys
+        }
     
-    def score_section(self, section_text, section_name):
+    def score_section(self, section_text, section_name, found=None):
         """
         Score a section based on content quality and completeness
+        (`found`: the quality patterns in the text, if already scanned)
         """
         if section_text is None or len(section_text.strip()) == 0:
             return 0
@@ -153,10 +338,9 @@ class PitchScoringModel:
         section_text = section_text.lower()
         
         # Count how many quality patterns are mentioned
-        matches = 0
-        for pattern in patterns:
-            if pattern.lower() in section_text:
-                matches += 1
+        if found is None:
+            found = self.pattern_automaton.found(section_text)
+        matches = sum(1 for pattern in patterns if pattern.lower() in found)
         
         # Calculate score based on pattern matches
         # If all patterns are present, score is 100
@@ -178,15 +362,107 @@ class PitchScoringModel:
         """
         Calculate overall pitch score
         """
-        overall_score = 0
-        section_scores = {}
+        return self.calculate_overall_scores([(sections, section_weights)])[0]
+    
+    def calculate_overall_scores(self, pitches):
+        """
+        [(overall score, section scores)] for many (sections, section
+        weights) pairs; with BERT loaded, the sections of all pitches are
+        embedded together and each score blends keyword and similarity
+        """
+        # Sections often share their text (a deck without paragraph breaks
+        # is every section at once), so each distinct text is scanned once
+        scanned = {}
+        keyword_scores = []
+        for sections, _ in pitches:
+            scores = {}
+            for section_name, section_text in sections.items():
+                found = None
+                if section_text:
+                    if section_text not in scanned:
+                        scanned[section_text] = self.pattern_automaton.found(section_text.lower())
+                    found = scanned[section_text]
+                scores[section_name] = self.score_section(section_text, section_name, found)
+            keyword_scores.append(scores)
         
-        for section_name, section_text in sections.items():
-            section_score = self.score_section(section_text, section_name)
-            section_scores[section_name] = section_score
-            overall_score += section_score * section_weights[section_name]
+        similarity = {}
+        if self.model is not None:
+            similarity = self.similarity_scores([
+                (section_name, section_text)
+                for sections, _ in pitches
+                for section_name, section_text in sections.items()
+                if section_text and section_text.strip()
+            ])
         
-        return overall_score, section_scores
+        results = []
+        for (sections, section_weights), scores in zip(pitches, keyword_scores):
+            overall_score = 0
+            section_scores = {}
+            for section_name, section_text in sections.items():
+                section_score = scores[section_name]
+                key = (section_name, section_text)
+                if key in similarity:
+                    section_score = ((1 - self.embedding_weight) * section_score
+                                     + self.embedding_weight * similarity[key])
+                section_scores[section_name] = section_score
+                overall_score += section_score * section_weights[section_name]
+            results.append((overall_score, section_scores))
+        return results
+
+# Process-wide scoring model, shared by every thread and request
+_model_lock = threading.Lock()
+_scoring_model = None
+_model_state = {"status": "cold", "error": None, "load_seconds": None}
+
+def get_scoring_model():
+    """
+    Return the process-wide PitchScoringModel, loading it on first use
+
+    The model is only read while scoring, so one instance serves every
+    thread; concurrent first callers wait for the same load.
+    """
+    global _scoring_model
+    if _scoring_model is not None:
+        return _scoring_model
+    with _model_lock:
+        if _scoring_model is None:
+            _model_state.update(status="loading", error=None)
+            start = time.perf_counter()
+            try:
+                model = PitchScoringModel(**embedding_settings())
+            except Exception as exc:
+                _model_state.update(status="failed", error=f"{type(exc).__name__}: {exc}")
+                raise
+            _model_state.update(status="ready", load_seconds=round(time.perf_counter() - start, 3))
+            _scoring_model = model
+    return _scoring_model
+
+def warm_up(background=True):
+    """
+    Load the scoring model now instead of on the first analysis
+    (in a daemon thread by default, so startup is not blocked)
+    """
+    def load():
+        try:
+            get_scoring_model()
+        except Exception:
+            pass  # recorded in model_status()
+
+    if not background:
+        return get_scoring_model()
+    thread = threading.Thread(target=load, name="pitch-model-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def model_status():
+    """
+    Readiness of the scoring model: status is cold, loading, ready or failed
+    """
+    model = _scoring_model
+    status = dict(_model_state, ready=model is not None)
+    if model is not None:
+        status["embedding_backend"] = "bert" if model.model is not None else "keywords"
+    return status
 
 def analyze_strengths_weaknesses(section_scores):
     """
@@ -313,15 +589,26 @@ def analyze_pitch(pitch_deck):
     """
     Analyze a pitch deck and provide a score with feedback
     """
+    return analyze_pitch_batch([pitch_deck])[0]
+
+def analyze_pitch_batch(pitch_decks):
+    """
+    analyze_pitch() for several decks, scoring all their sections together
+    """
     # Identify sections and their weights
-    sections, section_weights = identify_sections(pitch_deck["content"])
+    identified = [identify_sections(pitch_deck["content"]) for pitch_deck in pitch_decks]
     
-    # Initialize the scoring model
-    scoring_model = PitchScoringModel()
+    # Shared scoring model, loaded once per process
+    scoring_model = get_scoring_model()
     
     # Calculate overall score and section scores
-    overall_score, section_scores = scoring_model.calculate_overall_score(sections, section_weights)
-    
+    scores = scoring_model.calculate_overall_scores(identified)
+    return [
+        _pitch_report(pitch_deck, sections, overall_score, section_scores)
+        for pitch_deck, (sections, _), (overall_score, section_scores) in zip(pitch_decks, identified, scores)
+    ]
+
+def _pitch_report(pitch_deck, sections, overall_score, section_scores):
     # Analyze strengths and weaknesses
     strengths, weaknesses, improvement_suggestions = analyze_strengths_weaknesses(section_scores)
     
@@ -345,6 +632,135 @@ def analyze_pitch(pitch_deck):
     
     return output
 
+def _init_worker(threads):
+    # Split the CPUs between the workers unless the thread count is set
+    os.environ.setdefault('PITCH_TORCH_THREADS', str(threads))
+    # Every worker process loads its scoring model once, before its first deck
+    warm_up(background=False)
+
+def _analyze_chunk(pitch_decks):
+    try:
+        return analyze_pitch_batch(pitch_decks)
+    except Exception:
+        pass  # find the bad deck(s) one by one below
+    results = []
+    for pitch_deck in pitch_decks:
+        try:
+            results.append(analyze_pitch(pitch_deck))
+        except Exception as exc:
+            # One malformed deck must not stop an overnight batch
+            name = pitch_deck.get("name") if isinstance(pitch_deck, dict) else None
+            results.append({"pitch_name": name, "error": f"{type(exc).__name__}: {exc}"})
+    return results
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def analyze_pitches(pitch_decks, workers=None, ordered=True, chunksize=16):
+    """
+    Analyze many pitch decks over a pool of worker processes
+
+    Yields one analyze_pitch() result per deck as soon as it is ready, in
+    input order or, with ordered=False, in completion order. A deck that
+    fails yields {"pitch_name", "error"} instead of stopping the batch.
+    `pitch_decks` is read lazily, only a few chunks ahead of the workers,
+    so a generator over thousands of archived decks is fine.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunked(pitch_decks, chunksize)
+    if workers == 1:
+        for chunk in chunks:
+            yield from _analyze_chunk(chunk)
+        return
+    
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker,
+                               initargs=(max(1, (os.cpu_count() or 1) // workers),))
+    try:
+        max_pending = workers * 2
+        pending = deque() if ordered else set()
+        add = pending.append if ordered else pending.add
+        for chunk in itertools.islice(chunks, max_pending):
+            add(pool.submit(_analyze_chunk, chunk))
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done = wait(pending, return_when=FIRST_COMPLETED).done
+                pending -= done
+            for future in done:
+                yield from future.result()
+            # Top the pool back up as chunks finish
+            for chunk in itertools.islice(chunks, len(done)):
+                add(pool.submit(_analyze_chunk, chunk))
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def read_pitch_deck(file_path):
+    """
+    One {"name", "content"} deck from a .txt/.md file or a .json deck
+    object; None for any other kind of file
+    """
+    name, extension = os.path.splitext(os.path.basename(file_path))
+    if extension == ".json":
+        with open(file_path, encoding="utf-8") as f:
+            return json.load(f)
+    if extension in (".txt", ".md"):
+        with open(file_path, encoding="utf-8", errors="replace") as f:
+            return {"name": name, "content": f.read()}
+    return None
+
+def read_pitch_decks(path):
+    """
+    Yield {"name", "content"} decks from a JSONL file ("-" for stdin) or a
+    directory of .txt/.md decks and .json deck objects
+    """
+    if os.path.isdir(path):
+        for filename in sorted(os.listdir(path)):
+            pitch_deck = read_pitch_deck(os.path.join(path, filename))
+            if pitch_deck is not None:
+                yield pitch_deck
+        return
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def run_batch(inputs, output=None, workers=None, ordered=True, progress_interval=10.0):
+    """
+    Analyze every deck in `inputs`, streaming results to `output` as JSONL
+    (stdout by default) and reporting throughput on stderr
+    """
+    out = open(output, "w", encoding="utf-8") if output else sys.stdout
+    decks = itertools.chain.from_iterable(read_pitch_decks(path) for path in inputs)
+    started = last_report = time.perf_counter()
+    count = failed = 0
+    try:
+        for result in analyze_pitches(decks, workers=workers, ordered=ordered):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            count += 1
+            failed += "error" in result
+            now = time.perf_counter()
+            if now - last_report >= progress_interval:
+                last_report = now
+                print(f"{count} decks, {count / (now - started):.1f} decks/s", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    print(f"Analyzed {count} decks ({failed} failed) in {elapsed:.1f}s: "
+          f"{count / elapsed if elapsed else 0.0:.1f} decks/s", file=sys.stderr)
+    return 1 if failed else 0
+
 def main():
     print("AI Pitch Analysis Model")
     print("=" * 50)
@@ -395,5 +811,17 @@ def main():
     
     return results
 
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Score pitch decks; without inputs, analyze the sample decks")
+    parser.add_argument("inputs", nargs="*", help="JSONL files of {name, content} decks ('-' for stdin) or deck directories")
+    parser.add_argument("--output", "-o", help="JSONL output file (default stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--unordered", action="store_true", help="write results as they finish, not in input order")
+    args = parser.parse_args(argv)
+    if args.inputs:
+        return run_batch(args.inputs, args.output, args.workers, ordered=not args.unordered)
+    main()
+    return 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(cli())
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Throughput/latency benchmarks for the founder-investor matcher
+
+Every scenario runs in a fresh child process against synthetic data and
+the local fake Gemini model, so no API key or network is needed and peak
+RSS is measured per scenario:
+
+    python benchmarks/bench_matching.py
+    python benchmarks/bench_matching.py --sizes 10,1000,100000 --scenarios load_csv
+    python benchmarks/bench_matching.py --save-baseline
+
+Results are compared against benchmarks/baseline.json; a throughput drop
+or p95 increase beyond --tolerance is reported as a regression (exit 1).
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+SCENARIOS = ("load_csv", "calculate_match_score", "index_route")
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_one(scenario, size, repeat, founders):
+    """
+    Run one scenario in this process and return its measurements
+    """
+    from synthetic_data import generate_founders, generate_investors
+
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    founders_csv = os.path.join(workdir, "founders.csv")
+    investors_csv = os.path.join(workdir, "investors.csv")
+    generate_founders(founders).to_csv(founders_csv, index=False)
+    generate_investors(size).to_csv(investors_csv, index=False)
+
+    import app_Assignment1 as matcher_app
+
+    latencies = []
+    if scenario == "load_csv":
+        for _ in range(repeat):
+            started = time.perf_counter()
+            matcher_app.load_csv(investors_csv, "investors")
+            latencies.append(time.perf_counter() - started)
+        items = size
+    else:
+        matcher_app.load_csv(founders_csv, "founders")
+        matcher_app.load_csv(investors_csv, "investors")
+        client = matcher_app.app.test_client()
+        items = 0
+        for i in range(repeat):
+            founder_id = i % founders + 1
+            started = time.perf_counter()
+            if scenario == "calculate_match_score":
+                items += len(matcher_app.calculate_match_score(founder_id, use_cache=False))
+            else:
+                response = client.post("/", data={"founder_id": str(founder_id)})
+                assert response.status_code == 200, response.status_code
+                items += size
+            latencies.append(time.perf_counter() - started)
+        items /= repeat
+
+    total = sum(latencies)
+    return {
+        "scenario": scenario,
+        "size": size,
+        "repeat": repeat,
+        "throughput": items * len(latencies) / total if total else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+        "model_calls": getattr(matcher_app.model, "calls", None),
+    }
+
+
+def run_child(scenario, size, args):
+    env = dict(os.environ)
+    env.update({
+        "GEMINI_FAKE_LATENCY": str(args.latency),
+        "GEMINI_FAKE_JITTER": str(args.jitter),
+        "GEMINI_FAKE_ERROR_RATE": str(args.error_rate),
+        "GEMINI_REQUESTS_PER_SECOND": "0",
+        "GEMINI_MAX_IN_FLIGHT": str(args.max_in_flight),
+        "MATCH_CACHE_DISABLED": "1",
+        "MATCH_CACHE_PATH": os.path.join(tempfile.gettempdir(), "bench_match_scores.sqlite"),
+    })
+    output = subprocess.run(
+        [sys.executable, __file__, "--run-one", scenario, str(size),
+         "--repeat", str(args.repeat), "--founders", str(args.founders)],
+        env=env, cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print each result next to its baseline and return the regressions
+    """
+    regressions = []
+    print(f"{'scenario':<24}{'size':>9}{'items/s':>14}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'RSS MB':>9}  vs baseline")
+    for result in results:
+        key = f"{result['scenario']}:{result['size']}"
+        line = (f"{result['scenario']:<24}{result['size']:>9}{result['throughput']:>14.1f}"
+                f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['peak_rss_mb']:>9.1f}")
+        base = baseline.get(key)
+        if base:
+            throughput_ratio = result['throughput'] / base['throughput'] if base['throughput'] else 1.0
+            p95_ratio = result['p95_ms'] / base['p95_ms'] if base['p95_ms'] else 1.0
+            line += f"  throughput x{throughput_ratio:.2f}, p95 x{p95_ratio:.2f}"
+            if throughput_ratio < 1 - tolerance or p95_ratio > 1 + tolerance:
+                line += "  REGRESSION"
+                regressions.append(key)
+        else:
+            line += "  (no baseline)"
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the founder-investor matcher")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--sizes", default="10,1000,10000", help="investor counts")
+    parser.add_argument("--founders", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake model latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="fake model extra random latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake model failure probability")
+    parser.add_argument("--max-in-flight", type=int, default=32)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--run-one", nargs=2, metavar=("SCENARIO", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        scenario, size = args.run_one
+        print(json.dumps(run_one(scenario, int(size), args.repeat, args.founders)))
+        return 0
+
+    results = [
+        run_child(scenario, int(size), args)
+        for scenario in args.scenarios.split(",")
+        for size in args.sizes.split(",")
+    ]
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        baseline.update({f"{r['scenario']}:{r['size']}": r for r in results})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Startup benchmark for the pitch analyzer
+
+Times, each in a fresh interpreter, importing pitch_analyzer, booting the
+Flask app (until the scoring model is ready) and a full keyword-only
+`python pitch_analyzer.py` run, and checks that none of them imported
+torch or transformers:
+
+    python benchmarks/bench_pitch_startup.py
+    python benchmarks/bench_pitch_startup.py --repeat 10 --limit 0.5
+
+Exits 1 if a median is above --limit seconds or a heavy module was loaded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+ANALYZER_DIR = os.path.join(os.path.dirname(HERE), "assignment2")
+
+HEAVY_MODULES = ("torch", "transformers")
+
+SCENARIOS = {
+    "import": "import pitch_analyzer",
+    "app_boot": "import app, pitch_analyzer; pitch_analyzer.get_scoring_model()",
+    "keyword_main": (
+        "import contextlib, io, pitch_analyzer\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    pitch_analyzer.main()"
+    ),
+}
+
+# Wraps a scenario so the child reports which heavy modules it ended up with
+PROBE = """
+{code}
+import json, sys
+print(json.dumps([name for name in {heavy!r} if name in sys.modules]))
+"""
+
+
+def run_once(code):
+    env = dict(os.environ)
+    env.pop("PITCH_EMBEDDING_MODEL", None)
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(code=code, heavy=HEAVY_MODULES)],
+        cwd=ANALYZER_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    elapsed = time.perf_counter() - started
+    return elapsed, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=float, default=1.0, help="max median seconds per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name in args.scenarios.split(","):
+        timings, heavy = [], set()
+        for _ in range(args.repeat):
+            elapsed, loaded = run_once(SCENARIOS[name])
+            timings.append(elapsed)
+            heavy.update(loaded)
+        median = statistics.median(timings)
+        status = "ok"
+        if median > args.limit:
+            status, failed = f"SLOW (limit {args.limit:.2f}s)", True
+        if heavy:
+            status, failed = f"imported {', '.join(sorted(heavy))}", True
+        print(f"{name:14} median {median * 1000:7.1f} ms  min {min(timings) * 1000:7.1f} ms  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
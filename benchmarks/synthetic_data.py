@@ -0,0 +1,76 @@
+"""
+Synthetic founders/investors generator for benchmarks
+
+Same industries, stages, business models, ticket ranges and focus areas as
+the generator in assignmnent1/main.ipynb, vectorized so it scales from 10
+to 10^6 rows:
+
+    python benchmarks/synthetic_data.py 100000 founders.csv investors.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+industries = ["HealthTech", "FinTech", "CleanTech", "EdTech", "E-commerce", "AI", "SaaS", "Cybersecurity", "AgTech", "RetailTech"]
+stages = ["Pre-seed", "Seed", "Series A", "Series B"]
+business_models = ["B2B SaaS", "B2C Subscription", "Marketplace", "Hardware + Subscription", "Transaction Fee"]
+investment_ranges = ["$100K-500K", "$500K-3M", "$1M-10M", "$2M-15M"]
+investor_focus = ["Digital Health", "Blockchain", "AI Applications", "Sustainability", "Cybersecurity", "Retail", "E-learning"]
+
+
+def _choice(rng, values, n):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+
+
+def _labels(prefix, numbers):
+    return pd.Series(numbers).astype(str).radd(prefix).to_numpy()
+
+
+def generate_founders(n, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, n + 1)
+    return pd.DataFrame({
+        "id": ids,
+        "name": _labels("Founder ", ids),
+        "industry": _choice(rng, industries, n),
+        "startup_stage": _choice(rng, stages, n),
+        "funding_required": pd.Series(rng.integers(100, 5001, n)).astype(str).radd("$").add("K").to_numpy(),
+        "traction": pd.Series(rng.integers(100, 50001, n)).astype(str).add(" active users").to_numpy(),
+        "business_model": _choice(rng, business_models, n),
+        "location": _labels("City ", rng.integers(1, 51, n)),
+    })
+
+
+def generate_investors(n, seed=1):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, n + 1)
+    return pd.DataFrame({
+        "id": ids,
+        "name": _labels("Investor ", ids),
+        "preferred_industry": _choice(rng, industries, n),
+        "investment_range": _choice(rng, investment_ranges, n),
+        "preferred_stage": _choice(rng, stages, n),
+        "key_focus_areas": _choice(rng, investor_focus, n),
+        "previous_investments": rng.integers(1, 21, n),
+        "location": _labels("City ", rng.integers(1, 51, n)),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic founders/investors CSVs")
+    parser.add_argument("rows", type=int, help="number of investors (and founders unless --founders)")
+    parser.add_argument("founders_csv")
+    parser.add_argument("investors_csv")
+    parser.add_argument("--founders", type=int, help="number of founders")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    generate_founders(args.founders or args.rows, args.seed).to_csv(args.founders_csv, index=False)
+    generate_investors(args.rows, args.seed + 1).to_csv(args.investors_csv, index=False)
+    print(f"Wrote {args.founders or args.rows} founders to {args.founders_csv} "
+          f"and {args.rows} investors to {args.investors_csv}")
+
+
+if __name__ == "__main__":
+    main()
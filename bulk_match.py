@@ -0,0 +1,244 @@
+"""
+Nightly all-pairs matching job
+
+Scores every founder against every investor and streams the pair scores to
+CSV, JSONL or Parquet as they complete. Progress is checkpointed per chunk
+of investors, so a crash or exhausted quota resumes where it stopped:
+
+    python bulk_match.py assignmnent1/founders.csv assignmnent1/investors.csv pairs.csv
+    python bulk_match.py founders.csv investors.csv pairs.jsonl --fake-latency 0.05
+
+Rows are written before the chunk is checkpointed, so a crash between the
+two can repeat that chunk's rows on resume (at-least-once output). The
+checkpoint is a cursor (founder, chunk) tied to --chunk-size: resuming
+with a different chunk size is refused rather than redoing pairs.
+
+The CLI has its own rate limiter, outside the app's QuotaScheduler, so by
+default it only takes --quota-share of the Gemini quota the app is
+configured with (GEMINI_REQUESTS_PER_SECOND / GEMINI_MAX_IN_FLIGHT) and
+leaves the rest to interactive traffic. While the app is serving, bulk
+work that has to share the key fairly belongs in POST /api/jobs, which
+queues it behind interactive calls.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from gemini_client import make_model
+from matcher import score_pairs, ERROR_SCORE
+from rate_limit import RateLimiter
+from score_cache import ScoreCache
+
+FIELDNAMES = ["founder_id", "investor_id", "match_score", "failed"]
+
+# Part of the app's Gemini quota the CLI uses unless told otherwise
+DEFAULT_QUOTA_SHARE = 0.25
+
+
+class CsvSink:
+    def __init__(self, path):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=FIELDNAMES)
+        if new_file:
+            self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlSink:
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row, default=int) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    """
+    Parquet files cannot be appended to, so every run writes its own part file
+    """
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        base, ext = os.path.splitext(path)
+        part = 0
+        while os.path.exists(f"{base}.part{part:04d}{ext}"):
+            part += 1
+        self.schema = pa.schema([
+            ("founder_id", pa.int64()),
+            ("investor_id", pa.int64()),
+            ("match_score", pa.int64()),
+            ("failed", pa.bool_()),
+        ])
+        self.writer = pq.ParquetWriter(f"{base}.part{part:04d}{ext}", self.schema)
+
+    def write(self, rows):
+        if rows:
+            self.writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def open_sink(path):
+    if path.endswith(".parquet"):
+        return ParquetSink(path)
+    if path.endswith(".jsonl"):
+        return JsonlSink(path)
+    return CsvSink(path)
+
+
+class CheckpointError(ValueError):
+    """
+    Raised when a checkpoint doesn't belong to this run's settings
+    """
+
+
+def load_checkpoint(path, chunk_size):
+    """
+    (founder index, chunk number) of the next chunk to score; (0, 0) for a new run
+    """
+    if not os.path.exists(path):
+        return 0, 0
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("chunk_size") != chunk_size:
+        raise CheckpointError(
+            f"{path} was written with --chunk-size {state.get('chunk_size')}, not {chunk_size}; "
+            f"resume with the same chunk size or write to a new output"
+        )
+    return state["founder"], state["chunk"]
+
+
+def save_checkpoint(path, chunk_size, founder, chunk):
+    # Write then rename so a crash never leaves a half-written checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"chunk_size": chunk_size, "founder": founder, "chunk": chunk}, f)
+    os.replace(tmp_path, path)
+
+
+def run(founders_df, investors_df, model, sink, checkpoint_path, chunk_size=500,
+        limiter=None, max_workers=8, batch_size=1, cache=None, max_failure_rate=0.5,
+        log=sys.stderr):
+    """
+    Score all pairs past the checkpoint cursor and stream them to `sink`
+
+    Returns (pairs written, finished). Stops early without checkpointing the
+    chunk when more than `max_failure_rate` of its calls fail, which is what
+    an exhausted quota looks like. Raises CheckpointError if the checkpoint
+    was written with another chunk size.
+    """
+    resume_founder, resume_chunk = load_checkpoint(checkpoint_path, chunk_size)
+    investors = investors_df.to_dict('records')
+    chunks = [investors[i:i + chunk_size] for i in range(0, len(investors), chunk_size)]
+    total = len(founders_df) * len(chunks)
+    written = 0
+    started = time.monotonic()
+
+    for founder_index, founder_info in enumerate(founders_df.to_dict('records')):
+        if founder_index < resume_founder:
+            continue
+        first_chunk = resume_chunk if founder_index == resume_founder else 0
+        for chunk_number in range(first_chunk, len(chunks)):
+            chunk = chunks[chunk_number]
+            scores = score_pairs(model, founder_info, chunk, limiter=limiter,
+                                 max_workers=max_workers, batch_size=batch_size, cache=cache)
+            failures = sum(1 for score in scores if score is None)
+            if failures > max_failure_rate * len(chunk):
+                print(f"Stopping: {failures}/{len(chunk)} calls failed for founder "
+                      f"{founder_info['id']}; rerun to resume.", file=log)
+                return written, False
+
+            sink.write([
+                {
+                    "founder_id": founder_info['id'],
+                    "investor_id": investor['id'],
+                    "match_score": ERROR_SCORE if score is None else score,
+                    "failed": score is None,
+                }
+                for investor, score in zip(chunk, scores)
+            ])
+            done = founder_index * len(chunks) + chunk_number + 1
+            save_checkpoint(checkpoint_path, chunk_size, *divmod(done, len(chunks)))
+
+            written += len(chunk)
+            elapsed = time.monotonic() - started
+            print(f"{done}/{total} chunks, {written} pairs, "
+                  f"{written / elapsed if elapsed else 0:.1f} rows/s", file=log)
+    return written, True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score every founder against every investor")
+    parser.add_argument("founders")
+    parser.add_argument("investors")
+    parser.add_argument("output", help="output file (.csv, .jsonl or .parquet)")
+    parser.add_argument("--checkpoint", help="defaults to <output>.checkpoint.json")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--quota-share", type=float, default=DEFAULT_QUOTA_SHARE,
+                        help="fraction of GEMINI_REQUESTS_PER_SECOND / GEMINI_MAX_IN_FLIGHT to use")
+    parser.add_argument("--requests-per-second", type=float,
+                        help="overrides --quota-share for the request rate")
+    parser.add_argument("--max-in-flight", type=int,
+                        help="overrides --quota-share for concurrent calls")
+    parser.add_argument("--max-failure-rate", type=float, default=0.5)
+    parser.add_argument("--model", default="gemini-1.5-pro")
+    parser.add_argument("--fake-latency", type=float, default=None,
+                        help="use the local fake model with this latency instead of Gemini")
+    parser.add_argument("--cache", help="SQLite score cache path (no cache by default)")
+    args = parser.parse_args(argv)
+    if not 0 < args.quota_share <= 1:
+        parser.error("--quota-share must be in (0, 1]")
+    if args.requests_per_second is None:
+        args.requests_per_second = float(os.environ.get("GEMINI_REQUESTS_PER_SECOND", 2)) * args.quota_share
+    if args.max_in_flight is None:
+        args.max_in_flight = max(1, int(int(os.environ.get("GEMINI_MAX_IN_FLIGHT", 8)) * args.quota_share))
+
+    founders_df = pd.read_csv(args.founders)
+    investors_df = pd.read_csv(args.investors)
+    model = make_model(args.model, fake_latency=args.fake_latency)
+    limiter = RateLimiter(args.requests_per_second, args.max_in_flight)
+    cache = ScoreCache(args.cache) if args.cache else None
+    checkpoint_path = args.checkpoint or args.output + ".checkpoint.json"
+    try:
+        load_checkpoint(checkpoint_path, args.chunk_size)
+    except CheckpointError as exc:
+        parser.error(str(exc))
+
+    sink = open_sink(args.output)
+    started = time.monotonic()
+    try:
+        written, finished = run(founders_df, investors_df, model, sink, checkpoint_path,
+                                chunk_size=args.chunk_size, limiter=limiter,
+                                max_workers=args.max_in_flight, batch_size=args.batch_size,
+                                cache=cache, max_failure_rate=args.max_failure_rate)
+    finally:
+        sink.close()
+    elapsed = time.monotonic() - started
+    print(f"Wrote {written} pairs in {elapsed:.1f}s "
+          f"({written / elapsed if elapsed else 0:.1f} rows/s)")
+    return 0 if finished else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
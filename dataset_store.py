@@ -0,0 +1,149 @@
+import itertools
+import threading
+
+import numpy as np
+
+from ingest import concat_frames
+from investor_index import InvestorIndex
+
+DEFAULT_NAMESPACE = "default"
+
+_versions = itertools.count(1)
+
+
+class Snapshot:
+    """
+    Immutable view of one namespace's founders and investors
+
+    Every upload or append creates a new Snapshot with a new `version`;
+    nothing in an existing snapshot is modified afterwards, so request
+    handlers can keep using the one they started with. Structures derived
+    from the data are memoized per snapshot through `derived()`, which
+    means they are invalidated automatically by the next version.
+    """
+    def __init__(self, founders=None, investors=None, investor_index=None):
+        self.founders = founders
+        self.investors = investors
+        self.investor_index = investor_index
+        self.version = next(_versions)
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+
+    def derived(self, key, build):
+        """
+        Return build() memoized for this snapshot under `key`
+        """
+        value = self._derived.get(key)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = build()
+                    self._derived[key] = value
+        return value
+
+
+class DatasetStore:
+    """
+    Namespaced (per session or tenant) store of dataset snapshots
+
+    Readers call snapshot() and never take a lock: swapping the dict entry
+    is atomic, so they see either the old or the new snapshot, never a
+    half-updated one. Writers build the new snapshot and swap it in under a
+    lock so concurrent uploads to the same namespace don't lose each other.
+    """
+    def __init__(self):
+        self._snapshots = {}
+        self._write_lock = threading.Lock()
+
+    def snapshot(self, namespace=DEFAULT_NAMESPACE):
+        snapshot = self._snapshots.get(namespace)
+        return snapshot if snapshot is not None else Snapshot()
+
+    def namespaces(self):
+        return list(self._snapshots)
+
+    def replace(self, namespace, type_, df):
+        """
+        Swap in a freshly uploaded founders or investors table
+        """
+        index = InvestorIndex(df) if type_ == 'investors' else None
+        with self._write_lock:
+            current = self.snapshot(namespace)
+            if type_ == 'founders':
+                new = Snapshot(df, current.investors, current.investor_index)
+            else:
+                new = Snapshot(current.founders, df, index)
+            self._snapshots[namespace] = new
+        return new
+
+    def append(self, namespace, type_, df):
+        """
+        Add rows to the current table without reloading it
+
+        The investor index is extended incrementally instead of rebuilt.
+        """
+        with self._write_lock:
+            new = self._appended(self.snapshot(namespace), type_, df)
+            self._snapshots[namespace] = new
+        return new
+
+    def upsert(self, namespace, type_, df):
+        """
+        Insert rows by `id`, replacing existing rows with the same id in place
+
+        When every id is new this is a plain append; replaced rows keep their
+        position so rankings break ties the same way as before the edit.
+        """
+        with self._write_lock:
+            current = self.snapshot(namespace)
+            table = current.founders if type_ == 'founders' else current.investors
+            if table is None or not df['id'].isin(table['id']).any():
+                new = self._appended(current, type_, df)
+                self._snapshots[namespace] = new
+                return new
+            positions = dict(zip(table['id'].tolist(), range(len(table))))
+            kept = table[~table['id'].isin(df['id'])]
+            order = np.concatenate([
+                np.flatnonzero(~table['id'].isin(df['id']).to_numpy()),
+                [positions.get(row_id, len(table) + i) for i, row_id in enumerate(df['id'].tolist())],
+            ])
+            merged = concat_frames([kept, df], type_)
+            merged = merged.iloc[np.argsort(order, kind='stable')].reset_index(drop=True)
+            new = self._with_table(current, type_, merged)
+            self._snapshots[namespace] = new
+        return new
+
+    def delete(self, namespace, type_, ids):
+        """
+        Remove the rows whose `id` is in `ids`
+        """
+        with self._write_lock:
+            current = self.snapshot(namespace)
+            table = current.founders if type_ == 'founders' else current.investors
+            if table is None:
+                return current
+            remaining = table[~table['id'].isin(list(ids))].reset_index(drop=True)
+            new = self._with_table(current, type_, remaining)
+            self._snapshots[namespace] = new
+        return new
+
+    @staticmethod
+    def _appended(current, type_, df):
+        if type_ == 'founders':
+            founders = df if current.founders is None else concat_frames([current.founders, df], type_)
+            return Snapshot(founders, current.investors, current.investor_index)
+        if current.investors is None:
+            return Snapshot(current.founders, df, InvestorIndex(df))
+        investors = concat_frames([current.investors, df], type_)
+        return Snapshot(current.founders, investors, current.investor_index.extend(df))
+
+    @staticmethod
+    def _with_table(current, type_, df):
+        if type_ == 'founders':
+            return Snapshot(df, current.investors, current.investor_index)
+        return Snapshot(current.founders, df, InvestorIndex(df))
+
+    def drop(self, namespace):
+        with self._write_lock:
+            self._snapshots.pop(namespace, None)
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeAPIError(Exception):
+    """
+    Error raised by FakeModel to simulate a failing API call
+    """
+
+
+class DeadlineExceeded(FakeAPIError):
+    """
+    Raised like google.api_core's DeadlineExceeded when a call outlives
+    the timeout in its request_options
+    """
+
+
+class FakeModel:
+    """
+    Local stand-in for genai.GenerativeModel used for offline runs
+
+    Every call sleeps for `latency` seconds plus up to `jitter` seconds of
+    random extra delay (or `slow_latency` seconds with probability
+    `slow_rate`), fails with probability `error_rate`, and otherwise
+    answers with a score that depends only on the prompt, so rankings are
+    reproducible. Batch prompts (one line per `investor_id`) get a JSON
+    array of scores back. A `request_options` timeout shorter than the
+    delay raises DeadlineExceeded once it runs out.
+    """
+    model_name = "fake"
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=None,
+                 slow_rate=0.0, slow_latency=1.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def score_for(self, text):
+        return int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16) % 101
+
+    def generate_content(self, prompt, request_options=None):
+        with self.lock:
+            self.calls += 1
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+            if self.slow_rate and self.random.random() < self.slow_rate:
+                delay = self.slow_latency
+            fail = self.error_rate and self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        timeout = (request_options or {}).get("timeout")
+        if timeout and delay > timeout:
+            time.sleep(timeout)
+            raise DeadlineExceeded(f"simulated call exceeded {timeout}s")
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise FakeAPIError("simulated API failure")
+        investor_lines = re.findall(r"- investor_id: ([^,]+),.*", prompt)
+        if investor_lines:
+            return FakeResponse(json.dumps([
+                {"investor_id": investor_id, "score": self.score_for(investor_id + prompt)}
+                for investor_id in investor_lines
+            ]))
+        return FakeResponse(f"Match Score: {self.score_for(prompt)}")
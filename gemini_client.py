@@ -0,0 +1,34 @@
+import os
+
+from fake_model import FakeModel
+
+
+def make_model(model_name="gemini-1.5-pro", api_key=None, fake_latency=None,
+               fake_jitter=0.0, fake_error_rate=0.0):
+    """
+    Return the Gemini model, or the local FakeModel when `fake_latency` is set
+
+    google.generativeai is only imported for the real model, so offline
+    runs (benchmarks, bulk jobs against the fake) don't need it installed.
+    """
+    if fake_latency is not None:
+        return FakeModel(latency=fake_latency, jitter=fake_jitter, error_rate=fake_error_rate)
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key or os.environ.get("GEMINI_API_KEY", ""))
+    return genai.GenerativeModel(model_name)
+
+
+def make_model_from_env(model_name="gemini-1.5-pro", api_key=None):
+    """
+    Like make_model, with GEMINI_FAKE_LATENCY / _JITTER / _ERROR_RATE
+    switching to the fake model
+    """
+    fake_latency = os.environ.get("GEMINI_FAKE_LATENCY")
+    return make_model(
+        model_name,
+        api_key=api_key,
+        fake_latency=float(fake_latency) if fake_latency else None,
+        fake_jitter=float(os.environ.get("GEMINI_FAKE_JITTER", 0)),
+        fake_error_rate=float(os.environ.get("GEMINI_FAKE_ERROR_RATE", 0)),
+    )
@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from prefilter import parse_money, parse_range, FUNDING_COLUMN, RANGE_MIN_COLUMN, RANGE_MAX_COLUMN
+
+# column -> kind; every column listed here is required
+FOUNDERS_SCHEMA = {
+    'id': 'int',
+    'name': 'text',
+    'industry': 'category',
+    'startup_stage': 'category',
+    'funding_required': 'money',
+    'traction': 'traction',
+    'business_model': 'category',
+    'location': 'category',
+}
+
+INVESTORS_SCHEMA = {
+    'id': 'int',
+    'name': 'text',
+    'preferred_industry': 'category',
+    'investment_range': 'range',
+    'preferred_stage': 'category',
+    'key_focus_areas': 'category',
+    'previous_investments': 'int',
+    'location': 'category',
+}
+
+SCHEMAS = {'founders': FOUNDERS_SCHEMA, 'investors': INVESTORS_SCHEMA}
+
+# Parsed traction ("44043 active users" -> 44043)
+TRACTION_COLUMN = "traction_value"
+
+# Only the first rejected rows are kept in the report
+MAX_REPORTED_ERRORS = 100
+
+
+class SchemaError(ValueError):
+    """
+    Raised when the uploaded file is empty, not a CSV or missing required columns
+    """
+
+
+class IngestReport:
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, row, reason):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'reason': reason})
+
+    def to_dict(self):
+        return {'accepted': self.accepted, 'rejected': self.rejected, 'errors': self.errors}
+
+
+def _parse_chunk(chunk, schema, report, seen_ids, row_offset=2):
+    """
+    Type one chunk of raw string columns and drop the rows that fail
+
+    Rejected rows are reported as their index + `row_offset`. An id already
+    in `seen_ids` (earlier rows, or the table being appended to) rejects
+    the row; accepted ids are added to it.
+    """
+    bad = pd.Series('', index=chunk.index, dtype=object)
+
+    def flag(mask, reason):
+        mask = mask & (bad == '')
+        bad[mask] = reason if isinstance(reason, str) else reason[mask]
+
+    def unparseable(column, raw):
+        return f"cannot parse {column} " + raw.map(repr)
+
+    for column, kind in schema.items():
+        raw = chunk[column]
+        missing = raw.isna() | (raw.str.strip() == '')
+        flag(missing, f"missing {column}")
+        if kind == 'int':
+            chunk[column] = pd.to_numeric(raw, errors='coerce')
+            flag(~missing & chunk[column].isna(), f"{column} is not a number")
+            # 2.7 must not be truncated to 2 later on
+            flag(~missing & (chunk[column] % 1 != 0), f"{column} is not a whole number")
+        elif kind == 'money':
+            chunk[FUNDING_COLUMN] = parse_money(raw)
+            flag(~missing & chunk[FUNDING_COLUMN].isna(), unparseable(column, raw))
+        elif kind == 'range':
+            low, high = parse_range(raw)
+            chunk[RANGE_MIN_COLUMN] = low
+            chunk[RANGE_MAX_COLUMN] = high
+            flag(~missing & (np.isnan(low) | np.isnan(high) | (low > high)), unparseable(column, raw))
+        elif kind == 'traction':
+            numbers = raw.str.extract(r"^\s*([\d,]+)")[0].str.replace(",", "", regex=False)
+            chunk[TRACTION_COLUMN] = pd.to_numeric(numbers, errors='coerce')
+            flag(~missing & chunk[TRACTION_COLUMN].isna(), unparseable(column, raw))
+
+    # Ids key upserts, deletes and rankings: keep the first row with each id
+    valid = bad == ''
+    ids = chunk['id'].where(valid)
+    duplicate = valid & (ids.duplicated() | ids.isin(list(seen_ids)))
+    flag(duplicate, "duplicate id " + ids.fillna(0).astype(np.int64).astype(str))
+
+    # Chunks keep counting the row index; CSVs add 2 for the header line and 1-based rows
+    for index, reason in bad[bad != ''].items():
+        report.reject(index + row_offset, reason)
+
+    chunk = chunk[bad == ''].copy()
+    for column, kind in schema.items():
+        if kind == 'int':
+            chunk[column] = chunk[column].astype(np.int64)
+        elif kind in ('category', 'range'):
+            # Ticket ranges come from a short list of bands, so they compress too
+            chunk[column] = chunk[column].str.strip().astype('category')
+    for column in (FUNDING_COLUMN, RANGE_MIN_COLUMN, RANGE_MAX_COLUMN, TRACTION_COLUMN):
+        if column in chunk:
+            chunk[column] = chunk[column].round().astype(np.int64)
+    seen_ids.update(chunk['id'].tolist())
+    return chunk
+
+
+def concat_frames(chunks, type_):
+    """
+    Concatenate typed frames, merging category dictionaries instead of
+    falling back to object columns
+    """
+    schema = SCHEMAS[type_]
+    if not chunks:
+        return None
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+    categories = [column for column, kind in schema.items() if kind in ('category', 'range')]
+    merged = {
+        column: union_categoricals([chunk[column].astype('category') for chunk in chunks])
+        for column in categories
+    }
+    frame = pd.concat([chunk.drop(columns=categories) for chunk in chunks], ignore_index=True)
+    for column in categories:
+        frame[column] = merged[column]
+    return frame[chunks[0].columns]
+
+
+def read_csv_typed(file, type_, chunksize=100000, existing_ids=()):
+    """
+    Read a founders/investors CSV in chunks into a compact, typed DataFrame
+
+    Industries, stages and other low-cardinality columns become `category`,
+    money and traction strings are parsed into integer columns once, and
+    rows that fail the schema are dropped and listed in the returned
+    IngestReport instead of breaking matching later. Rows repeating an
+    earlier id, or one in `existing_ids` (when appending), are rejected.
+    """
+    schema = SCHEMAS[type_]
+    report = IngestReport()
+    seen_ids = set(existing_ids)
+    chunks = []
+    empty = None
+    try:
+        reader = pd.read_csv(file, dtype=str, keep_default_na=False, na_values=[''],
+                             chunksize=chunksize)
+        for chunk in reader:
+            missing_columns = [column for column in schema if column not in chunk.columns]
+            if missing_columns:
+                raise SchemaError(f"{type_} file is missing columns: {', '.join(missing_columns)}")
+            chunk = _parse_chunk(chunk, schema, report, seen_ids)
+            report.accepted += len(chunk)
+            if len(chunk):
+                chunks.append(chunk)
+            elif empty is None:
+                empty = chunk
+    except pd.errors.EmptyDataError:
+        raise SchemaError(f"{type_} file is empty") from None
+    except (pd.errors.ParserError, UnicodeDecodeError) as exc:
+        raise SchemaError(f"{type_} file is not a valid CSV: {exc}") from None
+
+    frame = concat_frames(chunks, type_)
+    if frame is None:
+        # Keep a typed empty chunk, so appending to it later finds the same
+        # category dtypes and parsed columns as any other upload
+        frame = empty.reset_index(drop=True)
+    return frame, report
+
+
+def read_records_typed(records, type_):
+    """
+    Type a list of row dicts (e.g. a JSON request body) the same way
+    read_csv_typed types an uploaded file; rejected rows are reported by
+    their position in `records`
+    """
+    schema = SCHEMAS[type_]
+    report = IngestReport()
+    chunk = pd.DataFrame([
+        {column: None if value is None else str(value) for column, value in record.items()}
+        for record in records
+    ], dtype=object)
+    missing_columns = [column for column in schema if column not in chunk.columns]
+    if missing_columns:
+        raise SchemaError(f"{type_} rows are missing columns: {', '.join(missing_columns)}")
+    chunk = _parse_chunk(chunk, schema, report, set(), row_offset=0)
+    report.accepted += len(chunk)
+    return chunk.reset_index(drop=True), report
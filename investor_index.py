@@ -0,0 +1,193 @@
+import math
+import re
+from collections import defaultdict
+
+import numpy as np
+
+from prefilter import encode_investors, parse_money, top_k_candidates, FUNDING_COLUMN
+
+
+def _key(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return str(value).strip().lower()
+
+
+def _terms(value):
+    key = _key(value)
+    return set(re.findall(r"[a-z0-9]+", key)) if key else set()
+
+
+def amount_bucket(amount):
+    """
+    Bucket a dollar amount by decade ($100K-$999K -> 5, $1M-$9.9M -> 6, ...)
+    """
+    if amount is None or not amount > 0:
+        return None
+    return int(math.floor(math.log10(amount)))
+
+
+INDEX_FIELDS = ('industry', 'stage', 'focus', 'ticket')
+
+
+def _build_postings(records, arrays, offset):
+    postings = {field: defaultdict(list) for field in INDEX_FIELDS}
+    lows, highs = arrays['low'], arrays['high']
+    for i, record in enumerate(records):
+        position = offset + i
+        industry = _key(record.get('preferred_industry'))
+        if industry:
+            postings['industry'][industry].append(position)
+        stage = _key(record.get('preferred_stage'))
+        if stage:
+            postings['stage'][stage].append(position)
+        for term in _terms(record.get('key_focus_areas')):
+            postings['focus'][term].append(position)
+        low, high = amount_bucket(lows[i]), amount_bucket(highs[i])
+        if low is not None and high is not None:
+            for bucket in range(low, high + 1):
+                postings['ticket'][bucket].append(position)
+    return postings
+
+
+def _freeze(postings):
+    return {
+        field: {value: np.asarray(positions, dtype=np.int64) for value, positions in lists.items()}
+        for field, lists in postings.items()
+    }
+
+
+def _concat_arrays(old, new):
+    """
+    Concatenate pre-filter arrays, re-coding the new rows' industries
+    against the combined vocabulary
+    """
+    vocab = old['industry_vocab'].append(
+        new['industry_vocab'].difference(old['industry_vocab'], sort=False)
+    )
+    new_industry = new['industry'].copy()
+    known = new_industry >= 0
+    new_industry[known] = vocab.get_indexer(new['industry_vocab'][new_industry[known]])
+    return {
+        'industry_vocab': vocab,
+        'industry': np.concatenate([old['industry'], new_industry]),
+        'stage': np.concatenate([old['stage'], new['stage']]),
+        'low': np.concatenate([old['low'], new['low']]),
+        'high': np.concatenate([old['high'], new['high']]),
+    }
+
+
+class InvestorIndex:
+    """
+    Inverted index from investor preferences to investor positions
+
+    Built once per investor upload. Posting lists map preferred_industry,
+    preferred_stage, key_focus_areas terms and investment-range decade
+    buckets to sorted arrays of row positions in the investor table, so a
+    founder's candidate set only touches the lists it hits.
+    """
+    def __init__(self, investors_df=None):
+        self.size = 0
+        self.records = []
+        self.arrays = None
+        self.postings = {field: {} for field in INDEX_FIELDS}
+        if investors_df is not None:
+            # Row dicts are built once here instead of on every match request
+            self.records = investors_df.to_dict('records')
+            self.arrays = encode_investors(investors_df)
+            self.size = len(self.records)
+            self.postings = _freeze(_build_postings(self.records, self.arrays, 0))
+
+    def extend(self, new_investors_df):
+        """
+        Return a new index with `new_investors_df` appended
+
+        The current index is left untouched (readers may still hold it);
+        posting lists the new rows don't hit are shared, not copied.
+        """
+        if self.arrays is None:
+            return InvestorIndex(new_investors_df)
+        extended = InvestorIndex()
+        new_records = new_investors_df.to_dict('records')
+        new_arrays = encode_investors(new_investors_df)
+        extended.records = self.records + new_records
+        extended.arrays = _concat_arrays(self.arrays, new_arrays)
+        extended.size = self.size + len(new_records)
+        extended.postings = {field: dict(lists) for field, lists in self.postings.items()}
+        added = _build_postings(new_records, new_arrays, self.size)
+        for field, lists in added.items():
+            for value, positions in lists.items():
+                existing = extended.postings[field].get(value)
+                positions = np.asarray(positions, dtype=np.int64)
+                extended.postings[field][value] = (
+                    positions if existing is None else np.concatenate([existing, positions])
+                )
+        return extended
+
+    def lookup(self, field, value):
+        return self.postings[field].get(value, np.empty(0, dtype=np.int64))
+
+    def founder_lists(self, founder_info):
+        """
+        Posting lists hit by a founder's industry, stage, focus terms and ask
+        """
+        if FUNDING_COLUMN in founder_info:
+            funding = founder_info[FUNDING_COLUMN]
+        else:
+            funding = parse_money([founder_info.get('funding_required')])[0]
+        focus_terms = _terms(founder_info.get('industry')) | _terms(founder_info.get('business_model'))
+        focus = [self.lookup('focus', term) for term in focus_terms]
+        return {
+            'industry': self.lookup('industry', _key(founder_info.get('industry'))),
+            'stage': self.lookup('stage', _key(founder_info.get('startup_stage'))),
+            'focus': np.unique(np.concatenate(focus)) if focus else np.empty(0, dtype=np.int64),
+            'ticket': self.lookup('ticket', amount_bucket(funding)),
+        }
+
+    def candidates(self, founder_info, mode="any"):
+        """
+        Sorted investor positions for a founder
+
+        "any" is every investor whose preferred industry or focus areas hit
+        the founder's sector; "all" keeps only investors matching industry,
+        stage and ticket size together.
+        """
+        lists = self.founder_lists(founder_info)
+        if mode == "all":
+            result = lists['industry']
+            for field in ('stage', 'ticket'):
+                result = np.intersect1d(result, lists[field], assume_unique=True)
+            return result
+        return np.union1d(lists['industry'], lists['focus'])
+
+    def subset_arrays(self, positions):
+        """
+        Pre-filter arrays restricted to `positions`
+        """
+        return {
+            name: (values if name == 'industry_vocab' else values[positions])
+            for name, values in self.arrays.items()
+        }
+
+
+def candidate_positions(index, founder_rows, mode="", prefilter_k=0, semantic_k=0, semantic=None):
+    """
+    Positions of the investors to score for the founder in `founder_rows`
+
+    The index's candidates for `mode` ("" = every investor), then the best
+    `prefilter_k` of them by structured pre-score, then the `semantic_k`
+    most similar by `semantic()`, a SemanticMatcher over index.records
+    (0 skips a stage).
+    """
+    founder_info = founder_rows.iloc[0].to_dict()
+    if mode:
+        positions = index.candidates(founder_info, mode)
+    else:
+        positions = np.arange(index.size)
+    if prefilter_k and len(positions) > prefilter_k:
+        top = top_k_candidates(founder_rows.iloc[:1], None, prefilter_k,
+                               investor_arrays=index.subset_arrays(positions))[founder_info['id']]
+        positions = positions[top]
+    if semantic_k and len(positions) > semantic_k:
+        positions = semantic().top_k(founder_info, semantic_k, positions)
+    return positions
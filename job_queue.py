@@ -0,0 +1,173 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from metrics import counter, gauge
+
+JOBS_FINISHED = counter("match_jobs_total", "Background match jobs finished", ["status"])
+JOBS_QUEUED = gauge("match_jobs_queued", "Background match jobs waiting for a worker")
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of background jobs run by a bounded worker pool
+
+    submit() stores a JSON payload and returns the job id at once;
+    `workers` threads take queued jobs oldest first and run
+    handler(payload, progress). The handler reports progress with
+    progress(done, total, partial) where `partial` is an optional
+    zero-argument callable returning the partial result; it is only called
+    (and the row only written) every `progress_interval` seconds. The
+    handler's return value is stored as the job result.
+
+    Jobs are kept in the database, so the queue survives restarts: jobs
+    still marked running at start-up were interrupted and are queued again.
+    When the handler's inputs don't outlive the process, pass
+    `orphaned_error`: jobs left queued or running by an earlier process
+    are then marked failed with that error instead of being run.
+    """
+    def __init__(self, handler, path="match_jobs.sqlite", workers=2, progress_interval=0.5,
+                 orphaned_error=None):
+        self.handler = handler
+        self.path = path
+        self.progress_interval = progress_interval
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        self.stopping = False
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT, payload TEXT, created REAL, started REAL, "
+            "finished REAL, done INTEGER, total INTEGER, partial TEXT, result TEXT, error TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        if orphaned_error is None:
+            self.conn.execute("UPDATE jobs SET status = 'queued', started = NULL WHERE status = 'running'")
+        else:
+            orphaned = self.conn.execute(
+                "UPDATE jobs SET status = 'failed', finished = ?, error = ?, partial = NULL "
+                "WHERE status IN ('queued', 'running')", (time.time(), orphaned_error),
+            ).rowcount
+            if orphaned:
+                JOBS_FINISHED.inc(orphaned, status="failed")
+        self.conn.commit()
+        self._update_depth()
+        self.threads = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def _update_depth(self):
+        JOBS_QUEUED.set(self.conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0])
+
+    def submit(self, payload):
+        job_id = uuid.uuid4().hex
+        with self.ready:
+            self.conn.execute(
+                "INSERT INTO jobs (id, status, payload, created, done, total) VALUES (?, 'queued', ?, ?, 0, 0)",
+                (job_id, json.dumps(payload), time.time()),
+            )
+            self.conn.commit()
+            self._update_depth()
+            self.ready.notify()
+        return job_id
+
+    def pending_payloads(self):
+        """
+        Payloads of the jobs still queued or running
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT payload FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        return [json.loads(payload) for payload, in rows]
+
+    def get(self, job_id):
+        """
+        The job as a dict, or None if there is no such job
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, status, payload, created, started, finished, done, total, partial, result, error "
+                "FROM jobs WHERE id = ?", (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, status, payload, created, started, finished, done, total, partial, result, error = row
+        return {
+            "id": job_id,
+            "status": status,
+            "payload": json.loads(payload),
+            "created": created,
+            "started": started,
+            "finished": finished,
+            "progress": {"done": done, "total": total},
+            "partial": json.loads(partial) if partial else None,
+            "result": json.loads(result) if result else None,
+            "error": error,
+        }
+
+    def _claim(self):
+        with self.ready:
+            while not self.stopping:
+                row = self.conn.execute(
+                    "SELECT id, payload FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute("UPDATE jobs SET status = 'running', started = ? WHERE id = ?",
+                                      (time.time(), row[0]))
+                    self.conn.commit()
+                    self._update_depth()
+                    return row[0], json.loads(row[1])
+                self.ready.wait(timeout=1.0)
+        return None
+
+    def _reporter(self, job_id):
+        last_write = [0.0]
+
+        def progress(done, total, partial=None):
+            now = time.monotonic()
+            if done < total and now - last_write[0] < self.progress_interval:
+                return
+            last_write[0] = now
+            partial_json = json.dumps(partial(), default=str) if partial is not None else None
+            with self.lock:
+                self.conn.execute(
+                    "UPDATE jobs SET done = ?, total = ?, partial = COALESCE(?, partial) WHERE id = ?",
+                    (done, total, partial_json, job_id),
+                )
+                self.conn.commit()
+
+        return progress
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, result = ?, error = ?, partial = NULL WHERE id = ?",
+                (status, time.time(), json.dumps(result, default=str) if result is not None else None,
+                 error, job_id),
+            )
+            self.conn.commit()
+        JOBS_FINISHED.inc(status=status)
+
+    def _work(self):
+        while True:
+            job = self._claim()
+            if job is None:
+                return
+            job_id, payload = job
+            try:
+                result = self.handler(payload, self._reporter(job_id))
+            except Exception as exc:
+                self._finish(job_id, "failed", error=f"{type(exc).__name__}: {exc}")
+            else:
+                self._finish(job_id, "done", result=result)
+
+    def stop(self, timeout=None):
+        """
+        Let the workers finish their current job and exit
+        """
+        with self.ready:
+            self.stopping = True
+            self.ready.notify_all()
+        for thread in self.threads:
+            thread.join(timeout)
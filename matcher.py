@@ -0,0 +1,421 @@
+import heapq
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+
+from metrics import counter, histogram
+from rate_limit import RateLimiter
+from score_cache import pair_key
+from single_flight import SingleFlight
+
+# Score used when the model answers without a "Match Score:" line
+DEFAULT_SCORE = 50
+# Score used when the model call (or parsing its answer) fails
+ERROR_SCORE = 0
+# Share of the structured pre-score in a final match score (see combined_score)
+DEFAULT_STRUCTURED_WEIGHT = 0.3
+# Bump whenever the prompt wording changes so cached scores are not reused
+PROMPT_VERSION = "1"
+# Same for the batched prompt, which scores differently and is cached apart
+BATCH_PROMPT_VERSION = "batch-1"
+# Profile fields that actually go into the prompt
+FOUNDER_PROMPT_FIELDS = ('industry', 'startup_stage')
+INVESTOR_PROMPT_FIELDS = ('preferred_industry', 'preferred_stage')
+
+LLM_LATENCY = histogram("gemini_call_seconds", "Latency of Gemini generate_content calls", ["kind", "outcome"])
+PAIR_SCORES = counter("match_pair_scores_total",
+                      "Pair scores by outcome (default = no score in answer, fell back to 50; error = scored 0)",
+                      ["outcome"])
+BATCH_SPLITS = counter("match_batch_splits_total", "Malformed batch answers that were split and retried")
+DEADLINE_CUTOFFS = counter("match_deadline_cutoffs_total", "Scoring runs stopped by their latency budget")
+TOP_K_SKIPPED = counter("match_top_k_skipped_total", "Investors pruned by branch-and-bound top-K")
+CACHE_LOOKUPS = counter("match_cache_lookups_total", "Score cache lookups", ["result"])
+
+
+def model_name_of(model):
+    return getattr(model, 'model_name', type(model).__name__)
+
+
+def cache_key(model, founder_info, investor, batched=False):
+    """
+    Cache key for one pair: only the fields used in the prompt count, plus
+    which prompt (single pair or batched) produced the score
+    """
+    return pair_key(
+        {field: founder_info.get(field) for field in FOUNDER_PROMPT_FIELDS},
+        {field: investor.get(field) for field in INVESTOR_PROMPT_FIELDS},
+        model_name_of(model),
+        BATCH_PROMPT_VERSION if batched else PROMPT_VERSION,
+    )
+
+
+def combined_score(structured, score, weight):
+    """
+    Final match score of a pair: `weight` of its 0-100 structured score
+    plus the rest of the model's score clamped to 0-100
+
+    A failed call (None) stays None. The result never exceeds
+    score_bound(structured, weight), whatever the model answers.
+    """
+    if score is None:
+        return None
+    return int(round(weight * structured + (1 - weight) * min(100, max(0, score))))
+
+
+def score_bound(structured, weight):
+    """
+    Highest final score a pair with this structured score can get
+    """
+    return combined_score(structured, 100, weight)
+
+
+def build_prompt(founder_info, investor):
+    """
+    Build the compatibility prompt for one founder/investor pair
+    """
+    return f"""
+        Task: Analyze compatibility between a startup founder and an investor.
+        Founder Industry: {founder_info.get('industry', 'N/A')}, Stage: {founder_info.get('startup_stage', 'N/A')}
+        Investor Preferred Industry: {investor.get('preferred_industry', 'N/A')}, Stage: {investor.get('preferred_stage', 'N/A')}
+        Match Score: """
+
+
+def parse_score(text):
+    """
+    Extract the integer score from a model answer
+    """
+    if "Match Score:" in text:
+        return int(text.split("Match Score:")[1].strip())
+    return DEFAULT_SCORE
+
+
+def _timed_call(model, prompt, kind):
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        return model.generate_content(prompt)
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        LLM_LATENCY.observe(time.perf_counter() - started, kind=kind, outcome=outcome)
+
+
+def call_model(model, prompt, limiter=None, kind="pair"):
+    """
+    Run one generate_content call behind the limiter, timing the call itself
+    """
+    if limiter is not None:
+        with limiter:
+            return _timed_call(model, prompt, kind)
+    return _timed_call(model, prompt, kind)
+
+
+def score_pair(model, founder_info, investor, limiter=None):
+    """
+    Ask the model for one founder/investor score (None if the call failed)
+    """
+    prompt = build_prompt(founder_info, investor)
+    try:
+        response = call_model(model, prompt, limiter)
+        score = parse_score(response.text)
+    except Exception:
+        PAIR_SCORES.inc(outcome="error")
+        return None
+    PAIR_SCORES.inc(outcome="default" if "Match Score:" not in response.text else "ok")
+    return score
+
+
+def build_batch_prompt(founder_info, investors):
+    """
+    Build one prompt that scores several investors for the same founder
+    """
+    investor_lines = "\n".join(
+        f"        - investor_id: {investor.get('id', 'N/A')}, "
+        f"Preferred Industry: {investor.get('preferred_industry', 'N/A')}, "
+        f"Stage: {investor.get('preferred_stage', 'N/A')}"
+        for investor in investors
+    )
+    return f"""
+        Task: Analyze compatibility between a startup founder and each investor below.
+        Founder Industry: {founder_info.get('industry', 'N/A')}, Stage: {founder_info.get('startup_stage', 'N/A')}
+        Investors:
+{investor_lines}
+        Respond only with a JSON array with one object per investor:
+        [{{"investor_id": <investor_id>, "score": <integer 0-100>}}]
+        """
+
+
+def parse_batch_scores(text, investors):
+    """
+    Parse a batch answer into a list of scores aligned with `investors`
+
+    Raises ValueError if the answer is not a JSON array covering every investor.
+    """
+    text = text.strip()
+    # Models like to wrap JSON in markdown code fences
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.startswith("json"):
+            text = text[len("json"):]
+    items = json.loads(text)
+    if not isinstance(items, list):
+        raise ValueError("batch answer is not a JSON array")
+
+    scores_by_id = {}
+    for item in items:
+        scores_by_id[str(item["investor_id"])] = int(item["score"])
+
+    scores = []
+    for investor in investors:
+        investor_id = str(investor.get('id', 'N/A'))
+        if investor_id not in scores_by_id:
+            raise ValueError(f"no score for investor {investor_id}")
+        scores.append(scores_by_id[investor_id])
+    return scores
+
+
+def score_batch(model, founder_info, investors, limiter=None):
+    """
+    Score a batch of investors with a single model call
+
+    A malformed answer splits the batch in two and retries each half; a
+    batch of one falls back to the single-pair prompt. A failed call gives
+    None for the whole batch, like a failed single call would.
+    """
+    if len(investors) == 1:
+        return [score_pair(model, founder_info, investors[0], limiter)]
+
+    prompt = build_batch_prompt(founder_info, investors)
+    try:
+        response = call_model(model, prompt, limiter, kind="batch")
+    except Exception:
+        PAIR_SCORES.inc(len(investors), outcome="error")
+        return [None] * len(investors)
+
+    try:
+        scores = parse_batch_scores(response.text, investors)
+        PAIR_SCORES.inc(len(investors), outcome="ok")
+        return scores
+    except (ValueError, KeyError, TypeError):
+        BATCH_SPLITS.inc()
+        middle = len(investors) // 2
+        return (score_batch(model, founder_info, investors[:middle], limiter)
+                + score_batch(model, founder_info, investors[middle:], limiter))
+
+
+# Pair scores being computed right now, shared by every request
+PAIR_FLIGHTS = SingleFlight("pair")
+
+
+def _coalesced(keys, compute):
+    """
+    Scores for the pair `keys`, computing only those no other thread is
+    already scoring: compute(indexes) returns the scores of keys[i] for i
+    in indexes, the rest are awaited from the thread scoring them
+    """
+    claims = [PAIR_FLIGHTS.begin(key) for key in keys]
+    own = [i for i, (_, leader) in enumerate(claims) if leader]
+    scores = [None] * len(keys)
+    try:
+        if own:
+            for i, score in zip(own, compute(own)):
+                scores[i] = score
+    finally:
+        for i in own:
+            PAIR_FLIGHTS.finish(keys[i], claims[i][0], scores[i])
+    for i, (call, leader) in enumerate(claims):
+        if not leader:
+            scores[i] = PAIR_FLIGHTS.wait(call)
+    return scores
+
+
+def iter_scores(model, founder_info, investors, limiter=None, max_workers=8,
+                batch_size=1, cache=None, deadline=None):
+    """
+    Yield (position, score) for every investor as soon as it is scored
+
+    Cached pairs come first, then model results in completion order.
+    `limiter` bounds the request rate and the number of calls in flight.
+    With `batch_size` > 1 each model call scores up to that many investors.
+    Failed calls give None and are not cached. Pairs another request is
+    already scoring are awaited instead of sent again. Closing the
+    generator early cancels the calls that have not started yet, and so
+    does reaching `deadline` (a time.monotonic() value): iteration just
+    stops, leaving the rest of the investors unscored.
+    """
+    if limiter is None:
+        limiter = RateLimiter(max_in_flight=max_workers)
+
+    pending = list(range(len(investors)))
+    batched = batch_size > 1
+    keys = []
+    if cache is not None and cache.enabled:
+        keys = [cache_key(model, founder_info, investor, batched) for investor in investors]
+        cached = cache.get_many(keys)
+        pending = [i for i in pending if keys[i] not in cached]
+        CACHE_LOOKUPS.inc(len(keys) - len(pending), result="hit")
+        CACHE_LOOKUPS.inc(len(pending), result="miss")
+        for i, key in enumerate(keys):
+            if key in cached:
+                yield i, cached[key]
+
+    size = batch_size if batch_size > 1 else 1
+    groups = [pending[i:i + size] for i in range(0, len(pending), size)]
+
+    def score_group(group):
+        group_keys = [keys[i] if keys else cache_key(model, founder_info, investors[i], batched)
+                      for i in group]
+
+        def compute(own):
+            batch = [investors[group[j]] for j in own]
+            if batched:
+                return score_batch(model, founder_info, batch, limiter)
+            return [score_pair(model, founder_info, batch[0], limiter)]
+
+        return _coalesced(group_keys, compute)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {executor.submit(score_group, group): group for group in groups}
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                group = futures[future]
+                group_scores = future.result()
+                if keys:
+                    cache.set_many({keys[i]: score for i, score in zip(group, group_scores)
+                                    if score is not None})
+                for i, score in zip(group, group_scores):
+                    yield i, score
+        except FuturesTimeoutError:
+            DEADLINE_CUTOFFS.inc()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def score_pairs(model, founder_info, investors, limiter=None, max_workers=8,
+                batch_size=1, cache=None):
+    """
+    Score every investor concurrently and return the scores in input order
+    """
+    scores = [None] * len(investors)
+    for i, score in iter_scores(model, founder_info, investors, limiter=limiter,
+                                max_workers=max_workers, batch_size=batch_size, cache=cache):
+        scores[i] = score
+    return scores
+
+
+def score_founders(model, founders, investor, limiter=None, max_workers=8, cache=None):
+    """
+    Score one investor against many founders, in the order of `founders`
+
+    The reverse of score_pairs, for keeping per-founder rankings up to
+    date when a single investor changes.
+    """
+    if limiter is None:
+        limiter = RateLimiter(max_in_flight=max_workers)
+    scores = [None] * len(founders)
+    pending = list(range(len(founders)))
+    keys = [cache_key(model, founder_info, investor) for founder_info in founders]
+    use_cache = cache is not None and cache.enabled
+    if use_cache:
+        cached = cache.get_many(keys)
+        pending = [i for i in pending if keys[i] not in cached]
+        CACHE_LOOKUPS.inc(len(keys) - len(pending), result="hit")
+        CACHE_LOOKUPS.inc(len(pending), result="miss")
+        for i, key in enumerate(keys):
+            if key in cached:
+                scores[i] = cached[key]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_coalesced, [keys[i]],
+                            lambda own, i=i: [score_pair(model, founders[i], investor, limiter)]): i
+            for i in pending
+        }
+        for future in as_completed(futures):
+            scores[futures[future]] = future.result()[0]
+    if use_cache:
+        cache.set_many({keys[i]: scores[i] for i in pending if scores[i] is not None})
+    return scores
+
+
+def rank_matches(investors, scores):
+    """
+    Attach scores to copies of the investor rows and sort best first
+
+    The sort is stable, so the ranking is identical to scoring the
+    investors one after another. Failed calls rank as ERROR_SCORE.
+    """
+    matches = []
+    for investor, score in zip(investors, scores):
+        matches.append(dict(investor, match_score=ERROR_SCORE if score is None else score))
+    return sorted(matches, key=lambda x: x['match_score'], reverse=True)
+
+
+def score_investors(model, founder_info, investors, limiter=None, max_workers=8,
+                    batch_size=1, cache=None):
+    """
+    Score every investor concurrently and return them ranked by match score
+    """
+    scores = score_pairs(model, founder_info, investors, limiter=limiter,
+                         max_workers=max_workers, batch_size=batch_size, cache=cache)
+    return rank_matches(investors, scores)
+
+
+def top_k_indices(scores, k):
+    """
+    Indexes of the k best scores, best first
+
+    Failed calls (None) count as ERROR_SCORE and ties go to the earlier
+    index, so this picks the first k rows rank_matches would return.
+    """
+    return heapq.nsmallest(k, range(len(scores)),
+                           key=lambda i: (-(ERROR_SCORE if scores[i] is None else scores[i]), i))
+
+
+def iter_top_k_scores(model, founder_info, investors, structured, k, weight, limiter=None,
+                      max_workers=8, batch_size=1, cache=None, deadline=None):
+    """
+    Yield (position, final score) for the investors that can still make
+    the best k, branch-and-bound style
+
+    Final scores are combined_score(structured[i], model score, weight).
+    Investors are scored in waves, highest score_bound first; once k
+    scores are in and no investor left has a bound above the k-th best
+    (ties go to the earlier position, like rank_matches), the rest are
+    never sent to the model. Stops at `deadline` like iter_scores.
+    """
+    if limiter is None:
+        # One limiter across waves, so each wave doesn't get a fresh burst
+        limiter = RateLimiter(max_in_flight=max_workers)
+    bounds = [score_bound(value, weight) for value in structured]
+    order = sorted(range(len(investors)), key=lambda i: (-bounds[i], i))
+    wave_size = max_workers * max(1, batch_size)
+    heap = []  # (final score, -position) of the best k so far, weakest first
+    scored = 0
+
+    for start in range(0, len(order), wave_size):
+        if deadline is not None and time.monotonic() >= deadline:
+            # Cut short by the budget, not pruned
+            return
+        if len(heap) >= k and (bounds[order[start]], -order[start]) < heap[0]:
+            break
+        wave = [i for i in order[start:start + wave_size]
+                if len(heap) < k or (bounds[i], -i) > heap[0]]
+        for j, score in iter_scores(model, founder_info, [investors[i] for i in wave], limiter=limiter,
+                                    max_workers=max_workers, batch_size=batch_size, cache=cache,
+                                    deadline=deadline):
+            i = wave[j]
+            score = combined_score(structured[i], score, weight)
+            entry = (ERROR_SCORE if score is None else score, -i)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+            scored += 1
+            yield i, score
+
+    if deadline is None or time.monotonic() < deadline:
+        TOP_K_SKIPPED.inc(len(investors) - scored)
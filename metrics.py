@@ -0,0 +1,178 @@
+"""
+Minimal in-process metrics with Prometheus text exposition
+
+    CALLS = counter("gemini_calls_total", "Gemini calls", ["outcome"])
+    CALLS.inc(outcome="ok")
+    with timer(LATENCY):
+        ...
+    render()  # text for the /metrics endpoint
+
+Set METRICS_ENABLED=0 to turn every update into a no-op.
+"""
+import bisect
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("METRICS_ENABLED", "1") not in ("0", "false", "no")
+
+# Seconds; spans cache lookups up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = [(name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+               for name, value in pairs]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Counter:
+    type_name = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not ENABLED:
+            return
+        key = _label_key(self.labelnames, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            items = list(self.values.items())
+        return [(self.name + _format_labels(self.labelnames, key), value) for key, value in items]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        if not ENABLED:
+            return
+        key = _label_key(self.labelnames, labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram:
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., sum, count]
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        if not ENABLED:
+            return
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        with self.lock:
+            items = [(key, list(state)) for key, state in self.values.items()]
+        samples = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                samples.append((self.name + "_bucket" + _format_labels(self.labelnames, key, ("le", repr(float(bound)))), cumulative))
+            samples.append((self.name + "_bucket" + _format_labels(self.labelnames, key, ("le", "+Inf")), state[-1]))
+            samples.append((self.name + "_sum" + _format_labels(self.labelnames, key), state[-2]))
+            samples.append((self.name + "_count" + _format_labels(self.labelnames, key), state[-1]))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for sample, value in metric.samples():
+                lines.append(f"{sample} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help_text, labelnames=()):
+    return REGISTRY.register(Counter(name, help_text, labelnames))
+
+
+def gauge(name, help_text, labelnames=()):
+    return REGISTRY.register(Gauge(name, help_text, labelnames))
+
+
+def histogram(name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, help_text, labelnames, buckets))
+
+
+def render():
+    return REGISTRY.render()
+
+
+class timer:
+    """
+    Time a block into a histogram, and optionally into a per-request
+    `breakdown` dict (seconds, accumulated per stage)
+    """
+    def __init__(self, histogram, breakdown=None, stage=None, **labels):
+        self.histogram = histogram
+        self.breakdown = breakdown
+        self.stage = stage
+        if stage is not None and "stage" in histogram.labelnames:
+            labels.setdefault("stage", stage)
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self.started
+        self.histogram.observe(self.elapsed, **self.labels)
+        if self.breakdown is not None:
+            key = self.stage or self.labels.get("stage", self.histogram.name)
+            self.breakdown[key] = self.breakdown.get(key, 0.0) + self.elapsed
+        return False
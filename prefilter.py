@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+
+# Funding stages in order, used to give partial credit to neighbouring stages
+STAGE_ORDER = ["pre-seed", "seed", "series a", "series b", "series c", "series d"]
+MONEY_UNITS = {"": 1, "K": 1e3, "M": 1e6, "B": 1e9}
+
+# Weights of each structured signal in the 0-100 pre-score
+INDUSTRY_WEIGHT = 50
+STAGE_WEIGHT = 30
+TICKET_WEIGHT = 20
+
+# Columns holding already-parsed amounts, filled in by ingestion when present
+FUNDING_COLUMN = "funding_required_usd"
+RANGE_MIN_COLUMN = "investment_min_usd"
+RANGE_MAX_COLUMN = "investment_max_usd"
+
+_MONEY = r"\$?\s*([\d.]+)\s*([KMBkmb]?)"
+
+
+def _amount(numbers, units):
+    multipliers = units.fillna("").str.upper().map(MONEY_UNITS).fillna(1)
+    return pd.to_numeric(numbers, errors="coerce") * multipliers
+
+
+def parse_money(values):
+    """
+    Parse strings like "$3996K" into dollar amounts (NaN when unparseable)
+    """
+    parts = pd.Series(values, dtype="object").astype(str).str.extract("^" + _MONEY + "$")
+    return _amount(parts[0], parts[1]).to_numpy(dtype=float)
+
+
+def parse_range(values):
+    """
+    Parse strings like "$2M-15M" into (low, high) dollar arrays
+
+    A low end without a unit borrows the unit of the high end ("$2-15M").
+    """
+    parts = pd.Series(values, dtype="object").astype(str).str.extract(
+        "^" + _MONEY + r"\s*-\s*" + _MONEY + "$"
+    )
+    low_units = parts[1].where(parts[1].fillna("") != "", parts[3])
+    low = _amount(parts[0], low_units)
+    high = _amount(parts[2], parts[3])
+    return low.to_numpy(dtype=float), high.to_numpy(dtype=float)
+
+
+def _normalize(values):
+    return pd.Series(values, dtype="object").astype("string").str.strip().str.lower()
+
+
+def _stage_rank(values, missing):
+    ranks = {stage: rank for rank, stage in enumerate(STAGE_ORDER)}
+    return _normalize(values).map(ranks).fillna(missing).to_numpy(dtype=np.int16)
+
+
+def encode_investors(investors_df):
+    """
+    Turn the investor table into the numeric arrays used for pre-scoring
+    """
+    industries = pd.Categorical(_normalize(investors_df["preferred_industry"]))
+    if RANGE_MIN_COLUMN in investors_df and RANGE_MAX_COLUMN in investors_df:
+        low = investors_df[RANGE_MIN_COLUMN].to_numpy(dtype=float)
+        high = investors_df[RANGE_MAX_COLUMN].to_numpy(dtype=float)
+    else:
+        low, high = parse_range(investors_df["investment_range"])
+    return {
+        "industry_vocab": industries.categories,
+        "industry": industries.codes.astype(np.int32),
+        "stage": _stage_rank(investors_df["preferred_stage"], -100),
+        "low": low,
+        "high": high,
+    }
+
+
+def encode_founders(founders_df, investor_arrays):
+    """
+    Encode founders against the investor vocabulary
+
+    Unknown founder values get codes no investor can have, so they never match.
+    """
+    vocab = investor_arrays["industry_vocab"]
+    codes = vocab.get_indexer(_normalize(founders_df["industry"]))
+    codes[codes < 0] = -2
+    if FUNDING_COLUMN in founders_df:
+        funding = founders_df[FUNDING_COLUMN].to_numpy(dtype=float)
+    else:
+        funding = parse_money(founders_df["funding_required"])
+    return {
+        "industry": codes.astype(np.int32),
+        "stage": _stage_rank(founders_df["startup_stage"], -200),
+        "funding": funding,
+    }
+
+
+def _signals(founder_arrays, investor_arrays):
+    """
+    Industry match, stage fit and ticket fit in [0, 1] for every pair
+    """
+    industry = founder_arrays["industry"][:, None] == investor_arrays["industry"][None, :]
+    stage_gap = np.abs(founder_arrays["stage"][:, None] - investor_arrays["stage"][None, :])
+    stage = np.where(stage_gap == 0, 1.0, np.where(stage_gap == 1, 0.5, 0.0))
+
+    funding = founder_arrays["funding"][:, None]
+    low = investor_arrays["low"][None, :]
+    high = investor_arrays["high"][None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        below = np.log10(low / funding)
+        above = np.log10(funding / high)
+        distance = np.fmax(np.fmax(below, above), 0)
+    ticket = np.nan_to_num(np.clip(1 - distance, 0, 1), nan=0.0)
+    return industry, stage, ticket
+
+
+def structured_scores(founder_arrays, investor_arrays):
+    """
+    Score every founder against every investor in one vectorized pass
+
+    Returns a (founders x investors) float32 matrix of 0-100 pre-scores:
+    industry match, exact/adjacent stage and how well the funding ask fits
+    the investor's ticket range (decaying by decades outside it).
+    """
+    industry, stage, ticket = _signals(founder_arrays, investor_arrays)
+    scores = INDUSTRY_WEIGHT * industry + STAGE_WEIGHT * stage + TICKET_WEIGHT * ticket
+    return scores.astype(np.float32)
+
+
+def rounded_structured_scores(founder_arrays, investor_arrays):
+    """
+    structured_scores rounded to whole numbers, the structured part of a
+    final match score
+    """
+    return np.rint(structured_scores(founder_arrays, investor_arrays)).astype(np.int64)
+
+
+def _top_k_rows(scores, k):
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    # Highest first; ties keep investor order so results are deterministic
+    order = np.lexsort((top, -top_scores), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def top_k_candidates(founders_df, investors_df, k=50, investor_arrays=None,
+                     max_cells=5_000_000):
+    """
+    Return {founder id: positions of its top-k investors} by pre-score
+
+    Founders are processed in chunks so the score matrix never holds more
+    than `max_cells` cells, whatever the number of investors.
+    """
+    if investor_arrays is None:
+        investor_arrays = encode_investors(investors_df)
+    founder_arrays = encode_founders(founders_df, investor_arrays)
+    n_investors = len(investor_arrays["industry"])
+    chunk = max(1, max_cells // max(1, n_investors))
+
+    candidates = {}
+    founder_ids = founders_df["id"].to_numpy()
+    for start in range(0, len(founder_ids), chunk):
+        part = {name: values[start:start + chunk] for name, values in founder_arrays.items()}
+        top = _top_k_rows(structured_scores(part, investor_arrays), k)
+        for founder_id, positions in zip(founder_ids[start:start + chunk], top):
+            candidates[founder_id] = positions
+    return candidates
@@ -0,0 +1,68 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket limiting how many requests per second may start
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Take `tokens` if available and return 0, else return the seconds
+        until they will be
+        """
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """
+        Block until `tokens` tokens are available and take them
+        """
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Combines a token bucket (requests per second) with a cap on in-flight calls
+
+    Use as a context manager around every model call:
+
+        with limiter:
+            response = model.generate_content(prompt)
+    """
+    def __init__(self, requests_per_second=2.0, max_in_flight=8, burst=None):
+        self.bucket = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def __enter__(self):
+        self.in_flight.acquire()
+        if self.bucket is not None:
+            self.bucket.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.in_flight.release()
+        return False
@@ -0,0 +1,251 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from metrics import counter, gauge
+
+RETRIES = counter("gemini_retries_total", "Gemini calls retried after a transient error")
+HEDGES = counter("gemini_hedged_requests_total", "Duplicate requests sent after the p95 latency", ["outcome"])
+TIMEOUTS = counter("gemini_timeouts_total", "Gemini calls that missed their deadline")
+FAST_FAILS = counter("gemini_circuit_rejections_total", "Calls rejected because the circuit was open")
+CIRCUIT_STATE = gauge("gemini_circuit_open", "1 while the Gemini circuit breaker is open")
+
+# Exception class names (anywhere in the MRO) worth retrying. Names rather
+# than classes so google.api_core does not have to be importable.
+TRANSIENT_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "Aborted", "ServerError",
+    "TimeoutError", "ConnectionError", "CallTimeout", "FakeAPIError",
+}
+
+
+class CallTimeout(TimeoutError):
+    """
+    Raised when a call does not finish within its deadline
+    """
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling the API while the circuit breaker is open
+    """
+
+
+def is_transient(exc):
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(exc).__mro__)
+
+
+class CircuitBreaker:
+    """
+    Fails fast once the API looks down
+
+    After `failure_threshold` consecutive transient failures the circuit
+    opens and calls are rejected for `reset_timeout` seconds. Then one
+    trial call is let through (half-open): success closes the circuit,
+    failure opens it again.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half_open" and not self.trial_running:
+                self.trial_running = True
+                return
+        FAST_FAILS.inc()
+        raise CircuitOpenError("Gemini circuit breaker is open")
+
+    def record_success(self):
+        if not self.failures and self.opened_at is None:
+            return  # already closed, the common case needs no lock
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+        CIRCUIT_STATE.set(0)
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                CIRCUIT_STATE.set(1)
+            self.trial_running = False
+
+
+class LatencyTracker:
+    """
+    Rolling window of recent call latencies
+    """
+    def __init__(self, window=200, min_samples=20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q):
+        with self.lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+class ResilientModel:
+    """
+    Wraps a model's generate_content with retries, a circuit breaker,
+    per-call deadlines and optional hedged requests
+
+    - transient errors are retried up to `max_attempts` times with full
+      jitter exponential backoff (`base_delay` doubling up to `max_delay`);
+    - `timeout` bounds each attempt; it is passed to the client as
+      request_options so the request itself is dropped at the deadline;
+    - with `hedge=True`, an attempt still running after the recent p95
+      latency gets a duplicate request and the first answer wins.
+
+    Without hedging calls run on the caller's thread. Hedged calls run on a
+    pool and every request sent, including the losing one still finishing
+    in the background, holds one of `max_in_flight` slots until it returns,
+    so hedges never push real concurrency past the quota; a hedge is only
+    sent if a slot is free. Retries and hedges take a token from `bucket`
+    (the app's TokenBucket) so they count against the same request rate as
+    first attempts.
+    Everything else (model_name, calls, ...) is delegated to the model.
+    """
+    def __init__(self, model, max_attempts=3, base_delay=0.5, max_delay=8.0, timeout=30.0,
+                 hedge=False, breaker=None, bucket=None, max_in_flight=64):
+        self.model = model
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.hedge = hedge
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.bucket = bucket
+        self.latencies = LatencyTracker()
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _take_token(self):
+        if self.bucket is not None:
+            self.bucket.acquire()
+
+    def _call(self, prompt):
+        if self.timeout:
+            return self.model.generate_content(prompt, request_options={"timeout": self.timeout})
+        return self.model.generate_content(prompt)
+
+    def _start(self, prompt, timeout=None):
+        """
+        Send one request on the pool once a slot is free (within `timeout`
+        seconds; 0 = only if one is free now), else return None
+        """
+        if not self.slots.acquire(timeout=timeout):
+            return None
+        try:
+            future = self.executor.submit(self._call, prompt)
+        except BaseException:
+            self.slots.release()
+            raise
+        # The slot is held until the request returns, even after it lost the race
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def _attempt(self, prompt):
+        if not self.hedge:
+            return self._call(prompt)
+        started = time.monotonic()
+        hedge_after = self.latencies.percentile(95)
+        if hedge_after is None:
+            # Still learning the latency distribution
+            with self.slots:
+                response = self._call(prompt)
+            self.latencies.add(time.monotonic() - started)
+            return response
+        deadline = started + self.timeout if self.timeout else None
+        hedge_at = started + hedge_after
+        first = self._start(prompt, self.timeout or None)
+        if first is None:
+            TIMEOUTS.inc()
+            raise CallTimeout(f"no Gemini call slot freed up within {self.timeout}s")
+        futures = [first]
+        hedge_future = None
+        error = None
+
+        while futures:
+            wake_times = [t for t in (deadline, hedge_at) if t is not None]
+            timeout = max(0.0, min(wake_times) - time.monotonic()) if wake_times else None
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.remove(future)
+                if future.exception() is None:
+                    self.latencies.add(time.monotonic() - started)
+                    if hedge_future is not None:
+                        HEDGES.inc(outcome="won" if future is hedge_future else "lost")
+                    return future.result()
+                error = future.exception()
+            if done:
+                continue
+            now = time.monotonic()
+            if hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                hedge_future = self._start(prompt, timeout=0)
+                if hedge_future is None:
+                    HEDGES.inc(outcome="skipped")
+                    continue
+                self._take_token()
+                futures.append(hedge_future)
+            elif deadline is not None and now >= deadline:
+                TIMEOUTS.inc()
+                raise CallTimeout(f"Gemini call exceeded {self.timeout}s")
+        raise error
+
+    def generate_content(self, prompt):
+        self.breaker.before_call()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = self._attempt(prompt)
+            except Exception as exc:
+                if type(exc).__name__ == "DeadlineExceeded":
+                    TIMEOUTS.inc()
+                if not is_transient(exc):
+                    # The API answered; a bad request says nothing about it being down
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.max_attempts:
+                    raise
+                RETRIES.inc()
+                time.sleep(self.backoff(attempt))
+                self.breaker.before_call()
+                self._take_token()
+                continue
+            self.breaker.record_success()
+            return response
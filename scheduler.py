@@ -0,0 +1,148 @@
+import itertools
+import threading
+import time
+from collections import deque
+
+from metrics import counter, gauge, histogram
+from rate_limit import TokenBucket
+
+# Highest priority first: queued interactive calls always start before bulk ones
+PRIORITIES = ("interactive", "bulk")
+
+QUEUE_DEPTH = gauge("gemini_scheduler_queue_depth", "Gemini calls waiting for quota", ["priority"])
+QUEUE_WAIT = histogram("gemini_scheduler_wait_seconds", "Time Gemini calls waited for quota", ["priority"])
+DISPATCHED = counter("gemini_scheduler_dispatched_total", "Gemini calls let through by the scheduler", ["priority", "tenant"])
+
+
+def parse_weights(spec):
+    """
+    "acme=3,beta=1" -> {"acme": 3.0, "beta": 1.0}
+    """
+    weights = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        tenant, _, weight = item.partition("=")
+        weights[tenant.strip()] = float(weight)
+    return weights
+
+
+class _Waiter:
+    def __init__(self, priority, tenant, sequence):
+        self.priority = priority
+        self.tenant = tenant
+        self.sequence = sequence
+        self.enqueued = time.monotonic()
+
+
+class QuotaScheduler:
+    """
+    Central gate in front of generate_content for the shared Gemini key
+
+    Calls wait in per-priority, per-tenant FIFO queues. Whenever a call may
+    start (fewer than `max_in_flight` running and a token left in the
+    `requests_per_second` budget) the scheduler picks:
+
+    - the highest priority class with anything queued, so a new
+      interactive call jumps ahead of all queued bulk work (calls already
+      running are not interrupted);
+    - within that class, the tenant with the smallest virtual finish time
+      (weighted fair queuing: a tenant of weight 2 gets twice the calls of
+      a tenant of weight 1 while both have work queued);
+    - within that tenant, the oldest call.
+
+    limiter(priority, tenant) returns a context manager usable wherever a
+    RateLimiter is, so matcher code needs no changes.
+    """
+    def __init__(self, requests_per_second=2.0, max_in_flight=8, burst=None, tenant_weights=None):
+        self.bucket = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.max_in_flight = max_in_flight
+        self.tenant_weights = dict(tenant_weights or {})
+        self.in_flight = 0
+        self.queues = {priority: {} for priority in PRIORITIES}
+        # Virtual clocks for fair queuing, per class and per (class, tenant)
+        self.class_clock = {priority: 0.0 for priority in PRIORITIES}
+        self.tenant_clock = {}
+        self.sequence = itertools.count()
+        self.cond = threading.Condition()
+
+    def limiter(self, priority="interactive", tenant="default"):
+        if priority not in self.queues:
+            raise ValueError(f"unknown priority {priority!r}, expected one of {', '.join(PRIORITIES)}")
+        return _SchedulerLimiter(self, priority, tenant)
+
+    def _finish_time(self, priority, tenant):
+        return self.tenant_clock[(priority, tenant)] + 1.0 / self.tenant_weights.get(tenant, 1.0)
+
+    def _head(self):
+        for priority in PRIORITIES:
+            tenants = self.queues[priority]
+            if tenants:
+                tenant = min(tenants, key=lambda t: (self._finish_time(priority, t), tenants[t][0].sequence))
+                return tenants[tenant][0]
+        return None
+
+    def _dispatch(self, waiter):
+        tenants = self.queues[waiter.priority]
+        queue = tenants[waiter.tenant]
+        queue.popleft()
+        if not queue:
+            del tenants[waiter.tenant]
+        key = (waiter.priority, waiter.tenant)
+        # The class clock follows the virtual start time of the call being served
+        self.class_clock[waiter.priority] = self.tenant_clock[key]
+        self.tenant_clock[key] = self._finish_time(waiter.priority, waiter.tenant)
+        self.in_flight += 1
+        QUEUE_DEPTH.set(sum(len(q) for q in tenants.values()), priority=waiter.priority)
+        QUEUE_WAIT.observe(time.monotonic() - waiter.enqueued, priority=waiter.priority)
+        DISPATCHED.inc(priority=waiter.priority, tenant=waiter.tenant)
+
+    def acquire(self, priority="interactive", tenant="default"):
+        with self.cond:
+            waiter = _Waiter(priority, tenant, next(self.sequence))
+            if tenant not in self.queues[priority]:
+                # A tenant that was idle starts at the current virtual time, no credit saved up
+                key = (priority, tenant)
+                self.tenant_clock[key] = max(self.tenant_clock.get(key, 0.0), self.class_clock[priority])
+            self.queues[priority].setdefault(tenant, deque()).append(waiter)
+            QUEUE_DEPTH.set(sum(len(q) for q in self.queues[priority].values()), priority=priority)
+            # A higher priority arrival may now be the head
+            self.cond.notify_all()
+            while True:
+                timeout = None
+                if self._head() is waiter and self.in_flight < self.max_in_flight:
+                    timeout = self.bucket.try_acquire() if self.bucket is not None else 0.0
+                    if timeout == 0.0:
+                        self._dispatch(waiter)
+                        self.cond.notify_all()
+                        return
+                self.cond.wait(timeout)
+
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def depths(self):
+        with self.cond:
+            return {priority: sum(len(q) for q in tenants.values()) for priority, tenants in self.queues.items()}
+
+
+class _SchedulerLimiter:
+    """
+    RateLimiter-compatible handle on a QuotaScheduler for one class and tenant
+    """
+    def __init__(self, scheduler, priority, tenant):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.tenant = tenant
+
+    @property
+    def bucket(self):
+        return self.scheduler.bucket
+
+    def __enter__(self):
+        self.scheduler.acquire(self.priority, self.tenant)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.scheduler.release()
+        return False
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def pair_key(founder_fields, investor_fields, model_name, prompt_version):
+    """
+    Hash the profile fields that go into the prompt plus the model/prompt version
+    """
+    payload = json.dumps(
+        [founder_fields, investor_fields, model_name, prompt_version],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    """
+    On-disk SQLite cache of founder/investor match scores
+
+    Entries older than `ttl_seconds` are treated as misses, and once more
+    than `max_entries` are stored the least recently used ones are evicted.
+    Set `enabled=False` to bypass the cache entirely.
+    """
+    def __init__(self, path="match_scores.sqlite", ttl_seconds=7 * 24 * 3600,
+                 max_entries=100000, enabled=True):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "key TEXT PRIMARY KEY, score INTEGER, created REAL, accessed REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS scores_accessed ON scores (accessed)")
+        self.conn.commit()
+
+    def get_many(self, keys):
+        """
+        Return {key: score} for every key that is cached and still fresh
+        """
+        if not self.enabled or not keys:
+            return {}
+        now = time.time()
+        found = {}
+        with self.lock:
+            unique_keys = list(set(keys))
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT key, score, created FROM scores WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, score, created in rows:
+                    if self.ttl_seconds is None or now - created <= self.ttl_seconds:
+                        found[key] = score
+            self.conn.executemany(
+                "UPDATE scores SET accessed = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            self.conn.commit()
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items):
+        """
+        Store {key: score} and evict least recently used entries over the limit
+        """
+        if not self.enabled or not items:
+            return
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO scores (key, score, created, accessed) VALUES (?, ?, ?, ?)",
+                [(key, score, now, now) for key, score in items.items()],
+            )
+            if self.max_entries is not None:
+                self.conn.execute(
+                    "DELETE FROM scores WHERE key IN ("
+                    "SELECT key FROM scores ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self.conn.commit()
+
+    def set(self, key, score):
+        self.set_many({key: score})
+
+    def purge_expired(self):
+        if self.ttl_seconds is None:
+            return
+        with self.lock:
+            self.conn.execute("DELETE FROM scores WHERE created < ?", (time.time() - self.ttl_seconds,))
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM scores")
+            self.conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
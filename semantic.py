@@ -0,0 +1,157 @@
+import re
+import zlib
+
+import numpy as np
+
+# Dimension of the hashed feature space
+DIMENSIONS = 256
+
+FOUNDER_TEXT_FIELDS = ('industry', 'business_model', 'traction')
+INVESTOR_TEXT_FIELDS = ('preferred_industry', 'key_focus_areas')
+
+
+def _features(text):
+    """
+    Word unigrams, word bigrams and character trigrams of a short text
+
+    Character trigrams let related spellings meet ("E-learning" and
+    "EdTech" share little, but "AI" and "AI Applications" share a lot).
+    """
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    features = ["w:" + word for word in words]
+    features += ["b:" + a + "_" + b for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        features += ["c:" + padded[i:i + 3] for i in range(len(padded) - 2)]
+    return features
+
+
+def encode_text(text, dimensions=DIMENSIONS):
+    """
+    Hash a text into an L2-normalized float32 vector (signed hashing trick)
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for feature in _features(text):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dimensions] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def profile_text(record, fields):
+    return " ".join(str(record.get(field, "")) for field in fields if record.get(field) is not None)
+
+
+def encode_profiles(records, fields, dimensions=DIMENSIONS):
+    """
+    Encode many profiles, hashing each distinct text only once
+
+    Returns (unique vectors, inverse) with vectors[inverse[i]] being the
+    vector of records[i]; structured profiles repeat a lot, so this keeps
+    both encoding time and index size proportional to distinct profiles.
+    """
+    texts = [profile_text(record, fields) for record in records]
+    unique_texts, inverse = np.unique(np.asarray(texts, dtype=object), return_inverse=True)
+    vectors = np.stack([encode_text(text, dimensions) for text in unique_texts]) if len(unique_texts) \
+        else np.zeros((0, dimensions), dtype=np.float32)
+    return vectors, inverse.astype(np.int64)
+
+
+class VectorIndex:
+    """
+    Nearest-neighbour index over unit vectors (cosine similarity)
+
+    Brute force by default; with `n_lists` > 0 vectors are clustered with a
+    few rounds of k-means and queries only visit the `n_probe` closest
+    clusters (IVF), trading a little recall for speed on large tables.
+    """
+    def __init__(self, vectors, n_lists=0, n_probe=4, iterations=10, seed=0):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.n_probe = n_probe
+        self.centroids = None
+        self.lists = None
+        if n_lists and len(self.vectors) > n_lists:
+            self._train(n_lists, iterations, seed)
+
+    def _train(self, n_lists, iterations, seed):
+        rng = np.random.default_rng(seed)
+        centroids = self.vectors[rng.choice(len(self.vectors), n_lists, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = self.vectors[assignment == c]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[c] = centroid / norm if norm else centroid
+        assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assignment == c) for c in range(n_lists)]
+
+    def similarities(self, query):
+        """
+        Cosine similarity of `query` with every indexed vector
+        """
+        return self.vectors @ query
+
+    def search(self, query, k=10):
+        """
+        Return (positions, similarities) of the k most similar vectors
+        """
+        if self.centroids is not None:
+            probe = np.argsort(-(self.centroids @ query))[:self.n_probe]
+            candidates = np.concatenate([self.lists[c] for c in probe])
+        else:
+            candidates = np.arange(len(self.vectors))
+        sims = self.vectors[candidates] @ query
+        k = min(k, len(candidates))
+        if k == 0:
+            return candidates[:0], sims[:0]
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return candidates[top], sims[top]
+
+
+class SemanticMatcher:
+    """
+    Local, API-free founder/investor matcher over hashed profile vectors
+    """
+    def __init__(self, investor_records, dimensions=DIMENSIONS, n_lists=0):
+        self.dimensions = dimensions
+        vectors, self.inverse = encode_profiles(investor_records, INVESTOR_TEXT_FIELDS, dimensions)
+        self.index = VectorIndex(vectors, n_lists=n_lists)
+        # Investors grouped by profile vector (CSR layout) to expand search hits
+        self.members = np.argsort(self.inverse, kind="stable")
+        self.offsets = np.searchsorted(self.inverse[self.members], np.arange(len(vectors) + 1))
+
+    def founder_vector(self, founder_info):
+        return encode_text(profile_text(founder_info, FOUNDER_TEXT_FIELDS), self.dimensions)
+
+    def scores(self, founder_info, positions=None):
+        """
+        0-100 similarity scores for the investors at `positions` (all by default)
+        """
+        sims = self.index.similarities(self.founder_vector(founder_info))
+        inverse = self.inverse if positions is None else self.inverse[positions]
+        return np.rint(np.clip(sims[inverse], 0, 1) * 100).astype(np.int64)
+
+    def top_k(self, founder_info, k, positions=None):
+        """
+        Positions of the k investors most similar to the founder
+        """
+        if positions is None:
+            # Search distinct profiles (IVF when enabled) and expand to investors
+            unique_ids, _ = self.index.search(self.founder_vector(founder_info), k)
+            found = []
+            for unique_id in unique_ids:
+                found.append(self.members[self.offsets[unique_id]:self.offsets[unique_id + 1]])
+                if sum(len(group) for group in found) >= k:
+                    break
+            return np.concatenate(found)[:k] if found else np.empty(0, dtype=np.int64)
+        scores = self.scores(founder_info, positions)
+        k = min(k, len(scores))
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return np.asarray(positions)[top]
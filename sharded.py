@@ -0,0 +1,364 @@
+"""
+Scatter-gather matching over investor shards held by worker processes
+
+Every shard worker owns the investors whose id falls in its shard
+(id % number of shards) together with their investor index and its
+share of the Gemini quota, handed out by its own QuotaScheduler so
+requests keep their priority class. A match request fans out to all
+shards; each one runs the coordinator's candidate stages (index,
+structured pre-filter, semantic top-k) over its own investors, scores
+the candidates (branch-and-bound over their structured bounds when only
+the top k are wanted) and sends back its local top k, and the
+coordinator merges the shard results. Pre-filter and semantic stages
+keep their k per shard, so together the shards consider at least the
+candidates a single process would. Merging orders rows like rank_matches
+over the whole table would (score, then row position), so the answer
+does not depend on the number of shards. Shards must combine scores
+with the app's MATCH_STRUCTURED_WEIGHT.
+
+The app starts local workers itself (MATCH_SHARDS=4) and hands them the
+whole in-flight budget and all of the request rate but the coordinator's
+MATCH_COORDINATOR_QUOTA_SHARE (0.05 by default). Workers on other
+machines are started by hand, listed in MATCH_SHARD_ADDRESSES, and each
+given its part of that; with the default 2 requests/s and 8 in flight
+split over two servers:
+
+    MATCH_SHARD_AUTHKEY=secret python sharded.py --host 0.0.0.0 --port 7101 \\
+        --requests-per-second 0.95 --max-in-flight 4
+"""
+import argparse
+import itertools
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from gemini_client import make_model_from_env
+from matcher import (iter_scores, iter_top_k_scores, combined_score, top_k_indices,
+                     DEFAULT_STRUCTURED_WEIGHT, ERROR_SCORE)
+from investor_index import InvestorIndex, candidate_positions
+from prefilter import encode_founders, rounded_structured_scores
+from scheduler import QuotaScheduler
+from resilience import ResilientModel
+from score_cache import ScoreCache
+from semantic import SemanticMatcher
+
+AUTHKEY_ENV = "MATCH_SHARD_AUTHKEY"
+# How long past a request's deadline the coordinator still waits for shard answers
+DEADLINE_GRACE_SECONDS = 0.5
+
+
+class ShardError(RuntimeError):
+    """
+    Raised when a shard can't answer (stale data, lost connection, error)
+    """
+
+
+class ShardWorker:
+    """
+    One shard's investors and model, answering coordinator requests
+    """
+    def __init__(self, model, scheduler, max_workers=8, batch_size=1, cache=None,
+                 structured_weight=DEFAULT_STRUCTURED_WEIGHT):
+        self.model = model
+        self.scheduler = scheduler
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.cache = cache
+        self.structured_weight = structured_weight
+        # namespace -> (version, investor index, global row positions, {derived structures})
+        self.datasets = {}
+
+    def load(self, namespace, version, investors_df, positions):
+        index = InvestorIndex(investors_df) if len(investors_df) else None
+        self.datasets[namespace] = (version, index, positions, {})
+        return len(positions)
+
+    def match(self, namespace, version, founder_rows, k=0, use_cache=True, budget=None,
+              priority="interactive", stages=("", 0, 0)):
+        """
+        ([(score, position, investor)] for this shard's best k candidates
+        (every candidate when k is 0), candidate positions left unscored)
+
+        Candidates come from `stages`, the coordinator's (INDEX_CANDIDATES,
+        PREFILTER_TOP_K, SEMANTIC_TOP_K), applied to this shard's investors.
+
+        With a `budget` in seconds, scoring stops when it runs out and the
+        investors not scored by then (or pruned as unable to make the top
+        k) are returned as unscored positions.
+        Gemini calls queue in this shard's scheduler under `priority`,
+        with the namespace as tenant.
+        """
+        loaded = self.datasets.get(namespace)
+        if loaded is None or loaded[0] != version:
+            raise ShardError(f"shard holds {namespace!r} version {loaded and loaded[0]}, not {version}")
+        _, index, positions, derived = loaded
+        if index is None:
+            return [], []
+        deadline = time.monotonic() + budget if budget else None
+        mode, prefilter_k, semantic_k = stages
+
+        def semantic():
+            if 'semantic' not in derived:
+                derived['semantic'] = SemanticMatcher(index.records)
+            return derived['semantic']
+
+        # Scored in row order, so ties break by global position like the coordinator's merge
+        local = np.sort(candidate_positions(index, founder_rows, mode, prefilter_k, semantic_k, semantic))
+        records = [index.records[i] for i in local]
+        positions = [positions[i] for i in local]
+        founder_info = founder_rows.iloc[0].to_dict()
+        cache = self.cache if use_cache else None
+        arrays = index.subset_arrays(local)
+        founder_arrays = encode_founders(founder_rows.iloc[:1], arrays)
+        structured = rounded_structured_scores(founder_arrays, arrays)[0].tolist()
+        scores = {}
+        limiter = self.scheduler.limiter(priority, namespace)
+        if k:
+            # Investors branch-and-bound prunes are returned as unscored
+            results = iter_top_k_scores(self.model, founder_info, records, structured, k,
+                                        self.structured_weight, limiter=limiter, max_workers=self.max_workers,
+                                        batch_size=self.batch_size, cache=cache, deadline=deadline)
+        else:
+            results = ((i, combined_score(structured[i], score, self.structured_weight))
+                       for i, score in iter_scores(self.model, founder_info, records, limiter=limiter,
+                                                   max_workers=self.max_workers, batch_size=self.batch_size,
+                                                   cache=cache, deadline=deadline))
+        for i, score in results:
+            scores[i] = score
+        scored = sorted(scores)
+        kept = top_k_indices([scores[i] for i in scored], k) if k else range(len(scored))
+        rows = [(ERROR_SCORE if scores[scored[j]] is None else scores[scored[j]],
+                 positions[scored[j]], records[scored[j]]) for j in kept]
+        return rows, [positions[i] for i in range(len(records)) if i not in scores]
+
+
+def _serve_connection(worker, conn, max_requests):
+    send_lock = threading.Lock()
+    executor = ThreadPoolExecutor(max_workers=max_requests)
+
+    def handle(request_id, method, args):
+        try:
+            reply = (request_id, "ok", getattr(worker, method)(*args))
+        except Exception as exc:
+            reply = (request_id, "error", f"{type(exc).__name__}: {exc}")
+        with send_lock:
+            conn.send(reply)
+
+    try:
+        while True:
+            request_id, method, args = conn.recv()
+            if method not in ("load", "match"):
+                with send_lock:
+                    conn.send((request_id, "error", f"unknown method {method!r}"))
+                continue
+            executor.submit(handle, request_id, method, args)
+    except (EOFError, OSError):
+        pass
+    finally:
+        executor.shutdown(wait=False)
+        conn.close()
+
+
+def serve(worker, host, port, authkey, exit_on_disconnect=False, max_requests=16):
+    """
+    Answer coordinators on host:port; prints the bound port on stdout
+    """
+    with Listener((host, port), authkey=authkey) as listener:
+        print(listener.address[1], flush=True)
+        while True:
+            conn = listener.accept()
+            if exit_on_disconnect:
+                # Local worker: lives exactly as long as its coordinator
+                _serve_connection(worker, conn, max_requests)
+                return
+            threading.Thread(target=_serve_connection, args=(worker, conn, max_requests),
+                             daemon=True).start()
+
+
+class ShardClient:
+    """
+    Connection to one shard worker; call() returns a Future
+    """
+    def __init__(self, address, authkey):
+        self.address = address
+        self.conn = Client(address, authkey=authkey)
+        self.pending = {}
+        self.ids = itertools.count()
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def call(self, method, *args):
+        future = Future()
+        with self.lock:
+            request_id = next(self.ids)
+            self.pending[request_id] = future
+        try:
+            with self.send_lock:
+                self.conn.send((request_id, method, args))
+        except OSError as exc:
+            with self.lock:
+                self.pending.pop(request_id, None)
+            future.set_exception(ShardError(f"shard {self.address} unreachable: {exc}"))
+        return future
+
+    def _read(self):
+        try:
+            while True:
+                request_id, status, payload = self.conn.recv()
+                with self.lock:
+                    future = self.pending.pop(request_id, None)
+                if future is None:
+                    continue
+                if status == "ok":
+                    future.set_result(payload)
+                else:
+                    future.set_exception(ShardError(f"shard {self.address}: {payload}"))
+        except (EOFError, OSError):
+            with self.lock:
+                pending, self.pending = self.pending, {}
+            for future in pending.values():
+                future.set_exception(ShardError(f"lost connection to shard {self.address}"))
+
+    def close(self):
+        self.conn.close()
+
+
+class ShardedMatcher:
+    """
+    Coordinator: splits investors across shard workers and merges their answers
+    """
+    def __init__(self, addresses, authkey, processes=()):
+        self.clients = [ShardClient(address, authkey) for address in addresses]
+        self.processes = list(processes)
+
+    @classmethod
+    def start_local(cls, shards, requests_per_second=2.0, max_in_flight=8, batch_size=1,
+                    cache_path=None, model_name="gemini-1.5-pro",
+                    structured_weight=DEFAULT_STRUCTURED_WEIGHT):
+        """
+        Start `shards` worker processes on this machine, splitting the
+        request rate and in-flight budget evenly between them (in-flight
+        slots that don't divide evenly go to the last shards). Pass only
+        the request rate the coordinator doesn't keep for itself.
+        """
+        authkey = secrets.token_hex(16)
+        env = dict(os.environ, **{AUTHKEY_ENV: authkey})
+        command = [
+            sys.executable, os.path.abspath(__file__), "--host", "127.0.0.1", "--port", "0",
+            "--requests-per-second", str(requests_per_second / shards),
+            "--batch-size", str(batch_size), "--model", model_name,
+            "--structured-weight", str(structured_weight), "--exit-on-disconnect",
+        ]
+        if cache_path:
+            command += ["--cache", cache_path]
+        processes, addresses = [], []
+        for shard in range(shards):
+            in_flight = max(1, (max_in_flight + shard) // shards)
+            process = subprocess.Popen(command + ["--max-in-flight", str(in_flight)], env=env,
+                                       stdout=subprocess.PIPE, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+            processes.append(process)
+            addresses.append(("127.0.0.1", int(process.stdout.readline())))
+        return cls(addresses, authkey.encode(), processes)
+
+    def shard_of(self, ids):
+        return np.asarray(ids, dtype=np.int64) % len(self.clients)
+
+    def load(self, namespace, version, investors_df):
+        """
+        Send every shard its part of the investor table (blocks until loaded)
+        """
+        shard = self.shard_of(investors_df['id'])
+        futures = []
+        for index, client in enumerate(self.clients):
+            mask = shard == index
+            futures.append(client.call("load", namespace, version, investors_df[mask],
+                                       np.flatnonzero(mask).tolist()))
+        for future in futures:
+            future.result()
+
+    def match(self, namespace, version, founder_rows, k=0, use_cache=True, deadline=None,
+              priority="interactive", stages=("", 0, 0)):
+        """
+        ([(score, position, investor)] for the best k scored investors (all
+        when k is 0) over every shard, best first, positions left unscored)
+
+        Shards stop scoring at `deadline` (a time.monotonic() value); one
+        that still hasn't answered shortly after it raises ShardError.
+        `stages` are the candidate stages each shard runs, see
+        ShardWorker.match.
+        """
+        budget = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+        futures = [client.call("match", namespace, version, founder_rows, k, use_cache, budget, priority,
+                               stages)
+                   for client in self.clients]
+        answers = []
+        for future in futures:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic()) + DEADLINE_GRACE_SECONDS
+            try:
+                answers.append(future.result(timeout=timeout))
+            except FuturesTimeoutError:
+                raise ShardError("shards did not answer within the latency budget") from None
+        rows = sorted(itertools.chain.from_iterable(shard_rows for shard_rows, _ in answers),
+                      key=lambda row: (-row[0], row[1]))
+        if k:
+            rows = rows[:k]
+        return rows, sorted(itertools.chain.from_iterable(unscored for _, unscored in answers))
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+        for process in self.processes:
+            process.terminate()
+            process.wait(timeout=5)
+
+
+def parse_addresses(spec):
+    """
+    "host:port,host:port" -> [(host, port), ...]
+    """
+    addresses = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        host, _, port = item.rpartition(":")
+        addresses.append((host, int(port)))
+    return addresses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve one investor shard for scatter-gather matching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7101)
+    parser.add_argument("--requests-per-second", type=float, default=2.0)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--model", default="gemini-1.5-pro")
+    parser.add_argument("--cache", help="SQLite score cache path (no cache by default)")
+    parser.add_argument("--structured-weight", type=float, default=DEFAULT_STRUCTURED_WEIGHT,
+                        help="share of the structured pre-score in match scores "
+                             "(the app's MATCH_STRUCTURED_WEIGHT)")
+    parser.add_argument("--exit-on-disconnect", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    authkey = os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        parser.error(f"set {AUTHKEY_ENV} to the secret shared with the coordinator")
+
+    scheduler = QuotaScheduler(args.requests_per_second, args.max_in_flight)
+    model = ResilientModel(make_model_from_env(args.model), bucket=scheduler.bucket,
+                           max_in_flight=args.max_in_flight)
+    cache = ScoreCache(args.cache) if args.cache else None
+    worker = ShardWorker(model, scheduler, max_workers=args.max_in_flight,
+                         batch_size=args.batch_size, cache=cache, structured_weight=args.structured_weight)
+    serve(worker, args.host, args.port, authkey.encode(), exit_on_disconnect=args.exit_on_disconnect)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import threading
+
+from metrics import counter
+
+COALESCED = counter("single_flight_coalesced_total", "Callers that waited on an identical in-flight computation", ["kind"])
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent computations of the same key
+
+    The first caller for a key runs the computation; callers arriving
+    while it is in flight wait for it and get the same result (or
+    exception) instead of starting their own. Nothing is kept once the
+    computation finishes, so this is not a cache.
+
+        flights = SingleFlight("match")
+        result = flights.do(key, lambda: expensive(key))
+    """
+    def __init__(self, kind):
+        self.kind = kind
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def begin(self, key):
+        """
+        Return (call, leader); the leader must finish() the call
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                COALESCED.inc(kind=self.kind)
+                return call, False
+            call = self.calls[key] = _Call()
+            return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        call.result = result
+        call.error = error
+        with self.lock:
+            if self.calls.get(key) is call:
+                del self.calls[key]
+        call.done.set()
+
+    @staticmethod
+    def wait(call):
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key, fn):
+        call, leader = self.begin(key)
+        if not leader:
+            return self.wait(call)
+        try:
+            result = fn()
+        except BaseException as exc:
+            self.finish(key, call, error=exc)
+            raise
+        self.finish(key, call, result)
+        return result
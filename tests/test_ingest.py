@@ -0,0 +1,89 @@
+"""
+Typed CSV ingestion, including empty uploads and appends to them
+
+    python -m pytest tests/test_ingest.py
+"""
+import io
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+from dataset_store import DatasetStore, DEFAULT_NAMESPACE  # noqa: E402
+from ingest import concat_frames, read_csv_typed, SchemaError  # noqa: E402
+from prefilter import RANGE_MIN_COLUMN, RANGE_MAX_COLUMN  # noqa: E402
+from synthetic_data import generate_investors  # noqa: E402
+
+
+def csv(df):
+    return io.StringIO(df.to_csv(index=False))
+
+
+def kinds(df):
+    # Category dtypes compare by their categories too; only the kind matters here
+    return {column: dtype.name for column, dtype in df.dtypes.items()}
+
+
+@pytest.fixture
+def investors():
+    return generate_investors(6)
+
+
+def test_rows_are_typed(investors):
+    df, report = read_csv_typed(csv(investors), 'investors')
+    assert report.to_dict() == {'accepted': 6, 'rejected': 0, 'errors': []}
+    assert str(df['preferred_industry'].dtype) == 'category'
+    assert df['id'].dtype == 'int64'
+    assert df[RANGE_MIN_COLUMN].dtype == 'int64' and (df[RANGE_MIN_COLUMN] <= df[RANGE_MAX_COLUMN]).all()
+
+
+def test_header_only_upload_is_typed_like_any_other(investors):
+    empty, report = read_csv_typed(csv(investors.head(0)), 'investors')
+    typed, _ = read_csv_typed(csv(investors), 'investors')
+    assert len(empty) == 0 and report.accepted == 0
+    assert kinds(empty) == kinds(typed)
+
+
+def test_upload_with_every_row_rejected_is_typed(investors):
+    bad = investors.head(2).copy()
+    bad['id'] = 'x'
+    empty, report = read_csv_typed(csv(bad), 'investors')
+    typed, _ = read_csv_typed(csv(investors), 'investors')
+    assert len(empty) == 0 and report.rejected == 2
+    assert kinds(empty) == kinds(typed)
+
+
+def test_append_to_empty_upload_keeps_types(investors):
+    empty, _ = read_csv_typed(csv(investors.head(0)), 'investors')
+    first, _ = read_csv_typed(csv(investors.iloc[:3]), 'investors')
+    second, _ = read_csv_typed(csv(investors.iloc[3:]), 'investors', existing_ids=first['id'])
+    frame = concat_frames([empty, first, second], 'investors')
+    assert frame['id'].tolist() == investors['id'].tolist()
+    assert kinds(frame) == kinds(first)
+    assert set(frame['preferred_industry'].cat.categories) == set(investors['preferred_industry'])
+
+
+def test_store_append_after_empty_upload(investors):
+    store = DatasetStore()
+    empty, _ = read_csv_typed(csv(investors.head(0)), 'investors')
+    store.replace(DEFAULT_NAMESPACE, 'investors', empty)
+    rows, _ = read_csv_typed(csv(investors.iloc[:4]), 'investors')
+    snapshot = store.append(DEFAULT_NAMESPACE, 'investors', rows)
+    assert len(snapshot.investors) == 4
+    assert snapshot.investor_index.size == 4
+    assert str(snapshot.investors['location'].dtype) == 'category'
+
+
+def test_ids_already_loaded_are_rejected_on_append(investors):
+    df, report = read_csv_typed(csv(investors), 'investors', existing_ids=[investors['id'].iloc[0]])
+    assert len(df) == 5 and report.rejected == 1
+    assert report.errors[0]['reason'].startswith('duplicate id')
+
+
+@pytest.mark.parametrize("content", ["", "not,a\nvalid\"csv"])
+def test_unusable_files_raise_schema_error(content):
+    with pytest.raises(SchemaError):
+        read_csv_typed(io.StringIO(content), 'investors')
@@ -0,0 +1,130 @@
+"""
+Background job queue: running, progress, failures and restarts
+
+    python -m pytest tests/test_job_queue.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from job_queue import JobQueue  # noqa: E402
+
+
+def wait_for_status(queue, job_id, statuses=("done", "failed"), timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        assert time.monotonic() < deadline, f"job still {job['status']}"
+        time.sleep(0.005)
+
+
+def double(payload, progress):
+    progress(1, 1)
+    return {"value": payload["value"] * 2}
+
+
+def test_submitted_job_runs_to_done(tmp_path):
+    queue = JobQueue(double, path=str(tmp_path / "jobs.sqlite"), workers=1)
+    try:
+        job_id = queue.submit({"value": 21})
+        job = wait_for_status(queue, job_id)
+        assert job["status"] == "done"
+        assert job["result"] == {"value": 42}
+        assert job["progress"] == {"done": 1, "total": 1}
+        assert job["payload"] == {"value": 21}
+        assert queue.get("missing") is None
+    finally:
+        queue.stop(5)
+
+
+def test_handler_errors_fail_the_job(tmp_path):
+    def broken(payload, progress):
+        raise KeyError("founder")
+
+    queue = JobQueue(broken, path=str(tmp_path / "jobs.sqlite"), workers=1)
+    try:
+        job = wait_for_status(queue, queue.submit({}))
+        assert job["status"] == "failed"
+        assert job["error"] == "KeyError: 'founder'"
+    finally:
+        queue.stop(5)
+
+
+def test_partial_results_are_visible_while_running(tmp_path):
+    release = threading.Event()
+
+    def slow(payload, progress):
+        progress(1, 3, lambda: ["first"])
+        release.wait(5)
+        return ["first", "second", "third"]
+
+    queue = JobQueue(slow, path=str(tmp_path / "jobs.sqlite"), workers=1, progress_interval=0)
+    try:
+        job_id = queue.submit({})
+        deadline = time.monotonic() + 5
+        while queue.get(job_id)["progress"]["done"] != 1:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+        job = queue.get(job_id)
+        assert job["status"] == "running" and job["partial"] == ["first"]
+        assert queue.pending_payloads() == [{}]
+        release.set()
+        job = wait_for_status(queue, job_id)
+        assert job["result"] == ["first", "second", "third"] and job["partial"] is None
+        assert queue.pending_payloads() == []
+    finally:
+        release.set()
+        queue.stop(5)
+
+
+def test_jobs_run_oldest_first(tmp_path):
+    order = []
+    queue = JobQueue(lambda payload, progress: order.append(payload["n"]),
+                     path=str(tmp_path / "jobs.sqlite"), workers=0)
+    job_ids = [queue.submit({"n": n}) for n in range(5)]
+    queue.stop()
+    queue = JobQueue(lambda payload, progress: order.append(payload["n"]),
+                     path=str(tmp_path / "jobs.sqlite"), workers=1)
+    try:
+        for job_id in job_ids:
+            wait_for_status(queue, job_id)
+        assert order == list(range(5))
+    finally:
+        queue.stop(5)
+
+
+def test_running_jobs_are_requeued_after_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    crashed = JobQueue(double, path=path, workers=0)
+    job_id = crashed.submit({"value": 4})
+    # A worker took the job, then the process died before finishing it
+    assert crashed._claim() == (job_id, {"value": 4})
+    assert crashed.get(job_id)["status"] == "running"
+    crashed.stop()
+
+    queue = JobQueue(double, path=path, workers=1)
+    try:
+        job = wait_for_status(queue, job_id)
+        assert job["status"] == "done" and job["result"] == {"value": 8}
+    finally:
+        queue.stop(5)
+
+
+def test_orphaned_jobs_fail_when_inputs_are_gone(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    crashed = JobQueue(double, path=path, workers=0)
+    running, queued = crashed.submit({"value": 1}), crashed.submit({"value": 2})
+    crashed._claim()
+    crashed.stop()
+
+    queue = JobQueue(double, path=path, workers=1, orphaned_error="restarted")
+    try:
+        for job_id in (running, queued):
+            job = queue.get(job_id)
+            assert job["status"] == "failed" and job["error"] == "restarted"
+    finally:
+        queue.stop(5)
@@ -0,0 +1,101 @@
+"""
+Embedding path of the pitch analyzer on a tiny random BERT (no download)
+
+    python -m pytest tests/test_pitch_embeddings.py
+"""
+import logging
+import os
+import sys
+import tempfile
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assignment2"))
+import pitch_analyzer  # noqa: E402
+
+
+def tiny_bert(seed=0):
+    """
+    A small randomly initialized BERT with a letter-level WordPiece
+    vocabulary plus the section keywords
+    """
+    letters = [chr(c) for c in range(ord('a'), ord('z') + 1)] + list('0123456789')
+    words = sorted({word for keywords in pitch_analyzer.SECTION_KEYWORDS.values()
+                    for keyword in keywords for word in keyword.split()})
+    vocab = (['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + list('.,:;!?$%-/()') + letters
+             + ['##' + c for c in letters] + words)
+    with tempfile.TemporaryDirectory() as directory:
+        vocab_file = os.path.join(directory, 'vocab.txt')
+        with open(vocab_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(vocab) + '\n')
+        tokenizer = transformers.BertTokenizer(vocab_file, do_lower_case=True)
+    config = transformers.BertConfig(vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2,
+                                     num_attention_heads=2, intermediate_size=64)
+    torch.manual_seed(seed)
+    return tokenizer, transformers.BertModel(config)
+
+
+def scoring_model(quantize=False, batch_size=32):
+    model = pitch_analyzer.PitchScoringModel(batch_size=batch_size)
+    model.use_encoder(*tiny_bert(), quantize=quantize)
+    return model
+
+
+@pytest.fixture(scope="module")
+def pitches():
+    return [pitch_analyzer.identify_sections(deck['content']) for deck in pitch_analyzer.create_sample_pitches()]
+
+
+def test_batched_scores_match_one_by_one(pitches):
+    model = scoring_model(batch_size=3)
+    batched = model.calculate_overall_scores(pitches)
+    for (score, sections), pitch in zip(batched, pitches):
+        single_score, single_sections = model.calculate_overall_score(*pitch)
+        assert score == pytest.approx(single_score, abs=1e-4)
+        assert sections == pytest.approx(single_sections, abs=1e-4)
+
+
+def test_embedding_batch_size_does_not_change_embeddings(pitches):
+    texts = [text for sections, _ in pitches for text in sections.values() if text]
+    one_by_one = scoring_model(batch_size=1).embed(texts)
+    batched = scoring_model(batch_size=32).embed(texts)
+    for a, b in zip(one_by_one, batched):
+        assert torch.allclose(a, b, atol=1e-5)
+
+
+def test_quantized_model(pitches):
+    model = scoring_model(quantize=True, batch_size=3)
+    assert any(isinstance(module, torch.ao.nn.quantized.dynamic.Linear) for module in model.model.modules())
+    batched = model.calculate_overall_scores(pitches)
+    for (score, _), pitch in zip(batched, pitches):
+        assert 0 <= score <= 100
+        # int8 activations are quantized per batch, so padding can move scores a little
+        assert score == pytest.approx(model.calculate_overall_score(*pitch)[0], abs=0.05)
+    unquantized = scoring_model().calculate_overall_scores(pitches)
+    for (score, _), (expected, _) in zip(batched, unquantized):
+        assert score == pytest.approx(expected, abs=5)
+
+
+def test_keyword_only_without_a_model(pitches):
+    keyword_only = pitch_analyzer.PitchScoringModel()
+    assert keyword_only.model is None
+    for (score, sections), pitch in zip(keyword_only.calculate_overall_scores(pitches), pitches):
+        assert (score, sections) == keyword_only.calculate_overall_score(*pitch)
+    # Blending in similarity changes the scores
+    assert scoring_model().calculate_overall_scores(pitches) != keyword_only.calculate_overall_scores(pitches)
+
+
+def test_failed_load_falls_back_to_keywords_and_logs(pitches, monkeypatch, caplog):
+    def unavailable(name, *args, **kwargs):
+        raise OSError(f"can't fetch {name}")
+
+    monkeypatch.setattr(transformers.BertTokenizer, "from_pretrained", unavailable)
+    with caplog.at_level(logging.ERROR, logger=pitch_analyzer.__name__):
+        model = pitch_analyzer.PitchScoringModel(embedding_model="bert-base-uncased")
+    assert model.model is None and model.tokenizer is None and model.ideal_embeddings is None
+    assert "bert-base-uncased" in caplog.text and "can't fetch" in caplog.text
+    assert (model.calculate_overall_scores(pitches)
+            == pitch_analyzer.PitchScoringModel().calculate_overall_scores(pitches))
@@ -0,0 +1,148 @@
+"""
+Retries, circuit breaker and hedged requests of ResilientModel over the
+fake model
+
+    python -m pytest tests/test_resilience.py
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fake_model import FakeAPIError, FakeModel  # noqa: E402
+from resilience import CircuitBreaker, CircuitOpenError, ResilientModel  # noqa: E402
+
+
+class FlakyModel(FakeModel):
+    """
+    FakeModel whose first `failures` calls raise `error`
+    """
+    def __init__(self, failures, error=FakeAPIError, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.error = error
+        self.attempts = 0
+
+    def generate_content(self, prompt, request_options=None):
+        with self.lock:
+            self.attempts += 1
+            fail = self.attempts <= self.failures
+        if fail:
+            raise self.error("flaky")
+        return super().generate_content(prompt, request_options)
+
+
+class SlowFirstModel(FakeModel):
+    """
+    FakeModel whose first call takes `slow_latency` seconds
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.attempts = 0
+
+    def generate_content(self, prompt, request_options=None):
+        with self.lock:
+            self.attempts += 1
+            slow = self.attempts == 1
+        if slow:
+            time.sleep(self.slow_latency)
+        return super().generate_content(prompt, request_options)
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_breaker_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.02)
+    breaker.record_failure()
+    time.sleep(0.03)
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_breaker_failed_trial_opens_again():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.02)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.03)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_transient_errors_are_retried():
+    model = ResilientModel(FlakyModel(2), max_attempts=3, base_delay=0, timeout=0)
+    assert model.generate_content("prompt").text.startswith("Match Score:")
+    assert model.model.attempts == 3
+
+
+def test_retries_give_up_after_max_attempts():
+    model = ResilientModel(FakeModel(error_rate=1.0), max_attempts=3, base_delay=0, timeout=0)
+    with pytest.raises(FakeAPIError):
+        model.generate_content("prompt")
+    assert model.model.calls == 3
+
+
+def test_other_errors_are_not_retried_and_keep_the_circuit_closed():
+    breaker = CircuitBreaker(failure_threshold=1)
+    model = ResilientModel(FlakyModel(5, error=ValueError), breaker=breaker, base_delay=0, timeout=0)
+    with pytest.raises(ValueError):
+        model.generate_content("prompt")
+    assert model.model.attempts == 1
+    assert breaker.state == "closed"
+
+
+def test_open_circuit_skips_the_model():
+    model = ResilientModel(FakeModel(error_rate=1.0), max_attempts=1, timeout=0,
+                           breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    with pytest.raises(FakeAPIError):
+        model.generate_content("prompt")
+    with pytest.raises(CircuitOpenError):
+        model.generate_content("prompt")
+    assert model.model.calls == 1
+
+
+def test_slow_call_is_hedged_and_the_fast_duplicate_wins():
+    model = ResilientModel(SlowFirstModel(slow_latency=1.0), hedge=True, timeout=5, max_in_flight=4)
+    for _ in range(model.latencies.min_samples):
+        model.latencies.add(0.01)
+    started = time.monotonic()
+    response = model.generate_content("prompt")
+    assert time.monotonic() - started < 0.5
+    assert response.text == FakeModel().generate_content("prompt").text
+    assert model.model.attempts == 2
+
+
+def test_hedges_are_skipped_without_a_free_slot():
+    model = ResilientModel(SlowFirstModel(slow_latency=0.1), hedge=True, timeout=5, max_in_flight=1)
+    for _ in range(model.latencies.min_samples):
+        model.latencies.add(0.01)
+    model.generate_content("prompt")
+    assert model.model.attempts == 1
+
+
+def test_concurrent_calls_are_all_answered():
+    model = ResilientModel(FakeModel(latency=0.005), timeout=5)
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(model.generate_content(f"p{i}")))
+               for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(results) == 10
@@ -0,0 +1,101 @@
+"""
+Priority and fair-share ordering of the QuotaScheduler
+
+    python -m pytest tests/test_scheduler.py
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scheduler import QuotaScheduler, parse_weights  # noqa: E402
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def dispatch_order(scheduler, calls):
+    """
+    Queue `calls` [(priority, tenant, label)] one by one behind a held
+    slot, then free it and return the labels in the order they started
+    """
+    order = []
+    scheduler.acquire()
+
+    def call(priority, tenant, label):
+        with scheduler.limiter(priority, tenant):
+            order.append(label)
+
+    threads = []
+    for queued, (priority, tenant, label) in enumerate(calls, 1):
+        thread = threading.Thread(target=call, args=(priority, tenant, label))
+        thread.start()
+        threads.append(thread)
+        wait_for(lambda: sum(scheduler.depths().values()) == queued)
+    scheduler.release()
+    for thread in threads:
+        thread.join(5)
+    return order
+
+
+def test_interactive_starts_before_bulk_queued_earlier():
+    scheduler = QuotaScheduler(requests_per_second=0, max_in_flight=1)
+    order = dispatch_order(scheduler, [("bulk", "default", "bulk-1"), ("bulk", "default", "bulk-2"),
+                                       ("interactive", "default", "interactive-1"),
+                                       ("interactive", "default", "interactive-2")])
+    assert order == ["interactive-1", "interactive-2", "bulk-1", "bulk-2"]
+
+
+def test_tenants_share_by_weight():
+    scheduler = QuotaScheduler(requests_per_second=0, max_in_flight=1, tenant_weights={"acme": 2})
+    calls = [("bulk", "acme", "acme")] * 6 + [("bulk", "beta", "beta")] * 6
+    order = dispatch_order(scheduler, calls)
+    # acme (weight 2) gets two calls for each of beta's while both have work queued
+    assert order[:6].count("acme") == 4
+    assert order[:6].count("beta") == 2
+    assert sorted(order) == sorted(label for _, _, label in calls)
+
+
+def test_single_tenant_keeps_fifo_order():
+    scheduler = QuotaScheduler(requests_per_second=0, max_in_flight=1)
+    order = dispatch_order(scheduler, [("bulk", "default", i) for i in range(5)])
+    assert order == list(range(5))
+
+
+def test_max_in_flight_is_never_exceeded():
+    scheduler = QuotaScheduler(requests_per_second=0, max_in_flight=2)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def call():
+        with scheduler.limiter("bulk"):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert peak[0] == 2
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        QuotaScheduler().limiter("urgent")
+
+
+def test_parse_weights():
+    assert parse_weights("acme=3, beta=1") == {"acme": 3.0, "beta": 1.0}
+    assert parse_weights(None) == {}
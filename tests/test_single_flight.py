@@ -0,0 +1,109 @@
+"""
+Coalescing of identical concurrent computations by SingleFlight
+
+    python -m pytest tests/test_single_flight.py
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from single_flight import SingleFlight  # noqa: E402
+
+
+class CountingFlight(SingleFlight):
+    """
+    SingleFlight that lets a test wait until callers have joined a call
+    """
+    def __init__(self, kind):
+        super().__init__(kind)
+        self.joined = threading.Semaphore(0)
+
+    def begin(self, key):
+        call, leader = super().begin(key)
+        if not leader:
+            self.joined.release()
+        return call, leader
+
+
+def start(fn):
+    thread = threading.Thread(target=fn)
+    thread.start()
+    return thread
+
+
+def test_concurrent_calls_share_one_computation():
+    flights = CountingFlight("test")
+    started, release = threading.Event(), threading.Event()
+    runs, results = [], []
+
+    def compute():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return {"answer": 42}
+
+    threads = [start(lambda: results.append(flights.do("key", compute)))]
+    assert started.wait(5)
+    threads += [start(lambda: results.append(flights.do("key", compute))) for _ in range(4)]
+    for _ in range(4):
+        assert flights.joined.acquire(timeout=5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(runs) == 1
+    assert results == [{"answer": 42}] * 5
+    assert not flights.calls
+
+
+def test_followers_get_the_leaders_exception():
+    flights = CountingFlight("test")
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    def call():
+        try:
+            flights.do("key", compute)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    threads = [start(call)]
+    assert started.wait(5)
+    threads += [start(call) for _ in range(2)]
+    for _ in range(2):
+        assert flights.joined.acquire(timeout=5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 3 and all(error is errors[0] for error in errors)
+
+
+def test_distinct_keys_do_not_coalesce():
+    flights = SingleFlight("test")
+    first, first_leads = flights.begin("a")
+    second, second_leads = flights.begin("b")
+    assert first_leads and second_leads and first is not second
+
+
+def test_waiting_on_a_finished_call():
+    flights = SingleFlight("test")
+    call, _ = flights.begin("key")
+    follower, leader = flights.begin("key")
+    assert follower is call and not leader
+    flights.finish("key", call, error=ValueError("bad"))
+    with pytest.raises(ValueError, match="bad"):
+        SingleFlight.wait(follower)
+
+
+def test_nothing_is_kept_after_the_call_finishes():
+    flights = SingleFlight("test")
+    runs = []
+    assert flights.do("key", lambda: runs.append(1) or len(runs)) == 1
+    assert flights.do("key", lambda: runs.append(1) or len(runs)) == 2
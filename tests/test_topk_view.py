@@ -0,0 +1,101 @@
+"""
+Incremental maintenance of the materialized top-k view
+
+    python -m pytest tests/test_topk_view.py
+"""
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from topk_view import TopKView  # noqa: E402
+
+
+def snapshot(version):
+    return lambda: SimpleNamespace(version=version)
+
+
+def brute_force(scores, order, k):
+    ranked = sorted(scores, key=lambda investor_id: (-scores[investor_id], order.index(investor_id)))
+    return [(investor_id, scores[investor_id]) for investor_id in ranked[:k]]
+
+
+def test_materialized_ranking_breaks_ties_by_row():
+    view = TopKView(2)
+    view.materialize(1, 1, [10, 20, 30, 40], [50, 80, 80, 20])
+    assert view.get(1, 1) == [(20, 80), (30, 80)]
+    assert view.get(2, 1) is None
+    assert view.get(1, 2) is None
+
+
+def test_upsert_enters_and_leaves_the_top_k():
+    view = TopKView(2)
+    view.materialize(1, 1, [10, 20, 30, 40], [50, 80, 80, 20])
+    view.update(1, snapshot(2), {50: {1: 90}})
+    assert view.get(1, 2) == [(50, 90), (20, 80)]
+    # Rescoring a top investor below the cut brings the next best back in
+    view.update(2, snapshot(3), {20: {1: 10}})
+    assert view.get(1, 3) == [(50, 90), (30, 80)]
+
+
+def test_delete_refills_from_the_remaining_scores():
+    view = TopKView(2)
+    view.materialize(1, 1, [10, 20, 30, 40], [50, 80, 80, 20])
+    view.update(1, snapshot(2), {}, deleted=[20])
+    assert view.get(1, 2) == [(30, 80), (10, 50)]
+    view.update(2, snapshot(3), {}, deleted=[40])
+    assert view.get(1, 3) == [(30, 80), (10, 50)]
+
+
+def test_founders_missing_from_the_changes_are_dropped():
+    view = TopKView(2)
+    view.materialize(1, 1, [10, 20], [50, 80])
+    view.materialize(2, 1, [10, 20], [70, 60])
+    view.update(1, snapshot(2), {30: {1: 90}})
+    assert view.get(1, 2) == [(30, 90), (20, 80)]
+    assert view.get(2, 2) is None
+
+
+def test_update_without_changes_resets_the_view():
+    view = TopKView(2)
+    view.materialize(1, 1, [10, 20], [50, 80])
+    assert view.update(1, snapshot(2), None).version == 2
+    assert view.get(1, 2) is None
+    assert view.founder_ids(2) == []
+
+
+def test_stale_materialization_is_ignored():
+    view = TopKView(2)
+    view.materialize(1, 2, [10, 20], [50, 80])
+    view.materialize(1, 1, [10, 20], [90, 10])
+    assert view.get(1, 2) == [(20, 80), (10, 50)]
+
+
+def test_random_changes_match_a_full_re_rank():
+    rng = random.Random(0)
+    k = 5
+    order = list(range(40))
+    scores = {founder_id: {i: rng.randint(0, 100) for i in order} for founder_id in (1, 2)}
+    view = TopKView(k)
+    for founder_id, founder_scores in scores.items():
+        view.materialize(founder_id, 1, order, [founder_scores[i] for i in order])
+    next_id = len(order)
+    for version in range(1, 200):
+        changes, deleted = {}, []
+        if rng.random() < 0.3 and len(order) > k:
+            deleted = [order.pop(rng.randrange(len(order)))]
+            for founder_scores in scores.values():
+                del founder_scores[deleted[0]]
+        else:
+            if rng.random() < 0.5:
+                investor_id = rng.choice(order)
+            else:
+                investor_id, next_id = next_id, next_id + 1
+                order.append(investor_id)
+            changes[investor_id] = {}
+            for founder_id, founder_scores in scores.items():
+                founder_scores[investor_id] = changes[investor_id][founder_id] = rng.randint(0, 100)
+        view.update(version, snapshot(version + 1), changes, deleted)
+        for founder_id, founder_scores in scores.items():
+            assert view.get(founder_id, version + 1) == brute_force(founder_scores, order, k)
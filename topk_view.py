@@ -0,0 +1,177 @@
+import bisect
+import heapq
+import threading
+
+from metrics import counter
+
+VIEW_READS = counter("topk_view_reads_total", "Materialized top-K lookups", ["result"])
+VIEW_UPDATES = counter("topk_view_updates_total", "Investor changes applied to the materialized rankings", ["change"])
+
+
+class FounderTopK:
+    """
+    All of one founder's investor scores and the k best of them, sorted
+
+    Entries are (-score, sequence, investor id): the sequence is the
+    investor's row position, so ties rank like the stable sort in
+    rank_matches.
+    """
+    def __init__(self, k, scores, sequence):
+        self.k = k
+        self.scores = dict(scores)
+        self.sequence = sequence
+        self._refill()
+
+    def _entry(self, investor_id):
+        return (-self.scores[investor_id], self.sequence[investor_id], investor_id)
+
+    def _refill(self):
+        # Only needed when a top-k entry drops out; no model calls involved
+        self.top = heapq.nsmallest(self.k, (self._entry(i) for i in self.scores))
+
+    def _discard(self, investor_id):
+        """
+        Forget the investor's score; True if it was in the top k
+        """
+        if investor_id not in self.scores:
+            return False
+        entry = self._entry(investor_id)
+        del self.scores[investor_id]
+        position = bisect.bisect_left(self.top, entry)
+        if position < len(self.top) and self.top[position] == entry:
+            del self.top[position]
+            return True
+        return False
+
+    def upsert(self, investor_id, score):
+        was_top = self._discard(investor_id)
+        self.scores[investor_id] = score
+        if was_top:
+            # A better investor outside the top k may now belong in it
+            self._refill()
+            return
+        entry = self._entry(investor_id)
+        if len(self.top) < self.k or entry < self.top[-1]:
+            bisect.insort(self.top, entry)
+            del self.top[self.k:]
+
+    def remove(self, investor_id):
+        if self._discard(investor_id) and len(self.scores) > len(self.top):
+            self._refill()
+
+
+class TopKView:
+    """
+    Materialized top-k matches per founder for one dataset namespace
+
+    A founder's ranking is materialized on its first read for a dataset
+    version. When investors change through update(), only the changed
+    investors are scored against the materialized founders and each
+    founder's top k is adjusted, so a change costs O(founders) model calls
+    instead of re-ranking every founder against every investor. Any other
+    dataset change leaves the view on an older version; it is then
+    discarded and rebuilt lazily on the next read.
+    """
+    def __init__(self, k):
+        self.k = k
+        self.version = None
+        self.founders = {}
+        # Investor id -> row position, the tie-breaker shared by every founder
+        self.sequence = {}
+        self.next_sequence = 0
+        self.lock = threading.Lock()
+        # Serializes writers; readers only need `lock`
+        self.write_lock = threading.Lock()
+        # Set while update() builds the next snapshot without holding `lock`
+        self.pending_version = None
+        self.swapped = threading.Condition(self.lock)
+
+    def _reset(self, version):
+        self.version = version
+        self.founders = {}
+        self.sequence = {}
+        self.next_sequence = 0
+
+    def founder_ids(self, version):
+        with self.lock:
+            return list(self.founders) if version == self.version else []
+
+    def get(self, founder_id, version):
+        """
+        [(investor id, score)] best first, or None if not materialized
+        """
+        with self.lock:
+            while self.pending_version is not None and version > self.pending_version:
+                # The change this snapshot came from is being applied; waiting for
+                # the swap beats re-ranking every investor against the new version
+                self.swapped.wait()
+            ranking = self.founders.get(founder_id) if version == self.version else None
+            if ranking is None:
+                VIEW_READS.inc(result="miss")
+                return None
+            VIEW_READS.inc(result="hit")
+            return [(investor_id, -score) for score, _, investor_id in ranking.top]
+
+    def materialize(self, founder_id, version, investor_ids, scores):
+        """
+        Store a founder's full set of scores for dataset `version`
+        """
+        with self.lock:
+            if self.version is not None and version < self.version:
+                return
+            if version != self.version:
+                self._reset(version)
+            if not self.sequence:
+                self.sequence.update((investor_id, position) for position, investor_id in enumerate(investor_ids))
+                self.next_sequence = len(investor_ids)
+            self.founders[founder_id] = FounderTopK(self.k, zip(investor_ids, scores), self.sequence)
+
+    def update(self, version, mutate, changes=None, deleted=()):
+        """
+        Apply a dataset change made by `mutate()` (which returns the new
+        snapshot) on top of `version`
+
+        `changes` maps each upserted investor id to {founder id: score}
+        for the founders in founder_ids(version); `deleted` lists removed
+        investor ids. Pass changes=None to drop the materialized rankings
+        (e.g. when scoring every founder would cost more than rebuilding).
+
+        The new snapshot is built without holding `lock`, so reads of the
+        current version carry on meanwhile; only applying the scored
+        changes and switching versions happens under it.
+        """
+        with self.lock:
+            self.pending_version = version
+        try:
+            snapshot = mutate()
+        except BaseException:
+            with self.lock:
+                self.pending_version = None
+                self.swapped.notify_all()
+            raise
+        with self.lock:
+            # Waiting readers wake up once the changes below are in
+            self.pending_version = None
+            self.swapped.notify_all()
+            if changes is None or version != self.version:
+                self._reset(snapshot.version)
+                VIEW_UPDATES.inc(change="reset")
+                return snapshot
+            for investor_id in deleted:
+                for ranking in self.founders.values():
+                    ranking.remove(investor_id)
+                self.sequence.pop(investor_id, None)
+            VIEW_UPDATES.inc(len(deleted), change="delete")
+            for investor_id, founder_scores in changes.items():
+                if investor_id not in self.sequence:
+                    self.sequence[investor_id] = self.next_sequence
+                    self.next_sequence += 1
+                for founder_id, ranking in list(self.founders.items()):
+                    if founder_id not in founder_scores:
+                        # Materialized after the change was scored; rebuild it on its next read
+                        del self.founders[founder_id]
+                        continue
+                    ranking.upsert(investor_id, founder_scores[founder_id])
+            VIEW_UPDATES.inc(len(changes), change="upsert")
+            self.version = snapshot.version
+            return snapshot